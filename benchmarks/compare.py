@@ -0,0 +1,76 @@
+"""Compare two benchmark reports and flag regressions.
+
+    python benchmarks/compare.py base.json new.json [--threshold 0.2]
+
+Exits with status 1 if any stage's wall time or p90 latency grew by more
+than the threshold (a fraction; 0.2 = 20%) and by at least --min-delta-ms,
+so sub-millisecond jitter on tiny stages is not flagged, or if CLI start-up
+now imports a heavy module (NumPy, an ASR framework...) it did not before,
+or if stitching now drops words from the short-repeat cases.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+def _metrics(stage: Dict) -> Iterator[Tuple[str, float]]:
+    if "wall_sec" in stage:
+        yield "wall_sec", stage["wall_sec"]
+    for key, val in stage.items():
+        if isinstance(val, dict) and "p90_ms" in val:
+            yield f"{key}.p90_ms", val["p90_ms"]
+
+
+def _change(old: float, new: float) -> Optional[float]:
+    return (new - old) / old if old else None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("base", type=Path)
+    ap.add_argument("new", type=Path)
+    ap.add_argument("--threshold", type=float, default=0.2)
+    ap.add_argument("--min-delta-ms", type=float, default=5.0)
+    args = ap.parse_args()
+    base, new = json.loads(args.base.read_text()), json.loads(args.new.read_text())
+    if base.get("bench_version") != new.get("bench_version"):
+        print(f"warning: bench versions differ ({base.get('bench_version')} vs {new.get('bench_version')})")
+    if base.get("audio_sec") != new.get("audio_sec"):
+        print(f"warning: audio lengths differ ({base.get('audio_sec')}s vs {new.get('audio_sec')}s)")
+
+    regressions = 0
+    print(f"{'stage / metric':40s} {base.get('git') or 'base':>12s} {new.get('git') or 'new':>12s}   change")
+    for name, stage in new.get("stages", {}).items():
+        old_stage = base.get("stages", {}).get(name, {})
+        old_metrics = dict(_metrics(old_stage))
+        for key, val in _metrics(stage):
+            old = old_metrics.get(key)
+            ch = _change(old, val) if old is not None else None
+            flag = ""
+            delta_ms = (val - old) * (1000 if key == "wall_sec" else 1) if old is not None else 0.0
+            if ch is not None and ch > args.threshold and delta_ms >= args.min_delta_ms:
+                flag = "  REGRESSION"
+                regressions += 1
+            pct = f"{ch:+.1%}" if ch is not None else "n/a"
+            print(f"{name + ' / ' + key:40s} {old if old is not None else float('nan'):12.4f} {val:12.4f}   {pct}{flag}")
+    heavy = set(new.get("stages", {}).get("startup", {}).get("heavy_modules", []))
+    heavy -= set(base.get("stages", {}).get("startup", {}).get("heavy_modules", []))
+    if heavy:
+        print(f"{'startup / heavy_modules':40s} now imports {', '.join(sorted(heavy))}  REGRESSION")
+        regressions += 1
+    lost = new.get("stages", {}).get("merge_segments", {}).get("words_lost")
+    if lost:
+        print(f"{'merge_segments / words_lost':40s} {lost:12d}  REGRESSION")
+        regressions += 1
+    for key in ("peak_rss_mb",):
+        print(f"{key:40s} {base.get(key) or 0:12.1f} {new.get(key) or 0:12.1f}")
+    print(f"{'spawns':40s} {base.get('spawns', {}).get('total', 0):12d} {new.get('spawns', {}).get('total', 0):12d}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
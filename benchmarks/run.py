@@ -0,0 +1,58 @@
+"""Run the offline pipeline benchmark and store the report under benchmarks/results/.
+
+    python benchmarks/run.py --minutes 10
+    python benchmarks/compare.py benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from meeting_notes.bench import STAGES, format_report, run_bench
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--minutes", type=float, default=10.0)
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--asr-rtf", type=float, default=0.0, help="simulated ASR cost as a real-time factor")
+    ap.add_argument("--llm-tps", type=float, default=0.0, help="simulated LLM tokens/s (0 = instant)")
+    ap.add_argument("--live-speed", type=float, default=100.0)
+    ap.add_argument("--repeat", type=int, default=3, help="keep the fastest of N runs per stage")
+    ap.add_argument("--out", type=Path, default=None, help="default: results/<git rev>.json")
+    args = ap.parse_args()
+
+    runs = [
+        run_bench(
+            args.minutes * 60,
+            stages=args.stages.split(","),
+            seed=args.seed,
+            asr_rtf=args.asr_rtf,
+            llm_tokens_per_sec=args.llm_tps,
+            live_speed=args.live_speed,
+        )
+        for _ in range(max(1, args.repeat))
+    ]
+    report = runs[0]
+    # Best-of-N per stage damps scheduler noise when comparing commits
+    for name in report["stages"]:
+        timed = [r["stages"][name] for r in runs if "wall_sec" in r["stages"][name]]
+        if timed:
+            report["stages"][name] = min(timed, key=lambda st: st["wall_sec"])
+    report["repeat"] = len(runs)
+    report["peak_rss_mb"] = max((r["peak_rss_mb"] or 0) for r in runs) or None
+
+    out = args.out or RESULTS_DIR / f"{report.get('git') or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(format_report(report))
+    print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
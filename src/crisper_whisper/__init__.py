@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, List, Optional
 
 
 # Lightweight shim that provides a minimal CrisperWhisper-like API
@@ -31,8 +31,8 @@ class _CWModel:
         dev = device or "cpu"
         self._backend = WhisperModel(model_name, device=dev, compute_type="int8", **kwargs)
 
-    def transcribe(self, audio_path: str, language: Optional[str] = None, vad: bool = True) -> _Result:
-        # Map parameters to faster-whisper flags
+    def transcribe(self, audio_path: Any, language: Optional[str] = None, vad: bool = True) -> _Result:
+        # Map parameters to faster-whisper flags (path or float32 array both work)
         gen, _info = self._backend.transcribe(
             audio_path,
             language=None if (language in (None, "auto")) else language,
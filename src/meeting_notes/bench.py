@@ -0,0 +1,452 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+
+# Bump when stages or measurements change so results are only compared like for like
+BENCH_VERSION = 2
+SAMPLE_RATE = 16000
+STAGES = ("startup", "transcribe_file", "merge_segments", "record_chunks", "summarize")
+# Must stay out of `meeting-notes --help` and the summarize path until a model is loaded
+HEAVY_MODULES = ("numpy", "sounddevice", "torch", "nemo", "faster_whisper", "crisper_whisper", "llama_cpp")
+
+_VOCAB = (
+    "we should ship the release next week after review budget owner deadline action item "
+    "customer feedback roadmap launch metrics latency memory bug fix test plan agree decide"
+).split()
+
+
+def synth_meeting(seconds: float, sr: int = SAMPLE_RATE, seed: int = 0, speech_ratio: float = 0.7) -> np.ndarray:
+    """Speech-like test audio: voiced utterances of 1-8 s separated by pauses over a noise floor."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    x = (0.001 * rng.standard_normal(n)).astype(np.float32)
+    t = 0.0
+    while t < seconds:
+        dur = rng.uniform(1.0, 8.0)
+        a, b = int(t * sr), min(n, int((t + dur) * sr))
+        if b > a:
+            x[a:b] += _voiced(b - a, sr, f0=rng.uniform(100, 220), amp=rng.uniform(0.05, 0.2))
+        t += dur + dur * (1 - speech_ratio) / speech_ratio * rng.uniform(0.5, 1.5)
+    return x
+
+
+def _voiced(n: int, sr: int, f0: float, amp: float) -> np.ndarray:
+    t = np.arange(n, dtype=np.float32) / sr
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.1 * np.sin(2 * np.pi * 0.5 * t))) / sr
+    x = sum(np.sin(k * phase) / k for k in range(1, 13))
+    syllables = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2
+    return (amp * x * syllables / 3).astype(np.float32)
+
+
+def write_wav(path: Path, x: np.ndarray, sr: int = SAMPLE_RATE) -> Path:
+    pcm = (np.clip(x, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+    return path
+
+
+class StubASR:
+    """ASR backend stand-in with the ``transcribe``/``transcribe_batch`` interface.
+
+    Emits deterministic words (one per voiced 0.4 s frame) so stitching sees
+    realistic text, and sleeps ``rtf`` x audio seconds to model inference cost.
+    """
+
+    backend_name = "stub"
+
+    def __init__(self, rtf: float = 0.0, sr: int = SAMPLE_RATE):
+        self.rtf = rtf
+        self.sr = sr
+        self.latencies: List[float] = []
+
+    def transcribe(self, audio, language=None, vad=None, **_) -> List[Dict]:
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios, language=None, vad=None, **_) -> List[List[Dict]]:
+        t0 = time.perf_counter()
+        arrays = [_read_wav(a) if isinstance(a, (str, Path)) else a for a in audios]
+        out = [self._segments(a) for a in arrays]
+        if self.rtf:
+            time.sleep(self.rtf * sum(a.shape[0] for a in arrays) / self.sr)
+        self.latencies.append(time.perf_counter() - t0)
+        return out
+
+    def _segments(self, audio: np.ndarray) -> List[Dict]:
+        frame = int(0.4 * self.sr)
+        n = audio.shape[0] // frame
+        if not n:
+            return []
+        rms = np.sqrt(np.mean(audio[: n * frame].reshape(n, frame) ** 2, axis=1))
+        voiced = np.flatnonzero(rms > 0.005)
+        words = [(float(i * 0.4), float((i + 1) * 0.4), _VOCAB[int(rms[i] * 1e4) % len(_VOCAB)]) for i in voiced]
+        return [
+            {"start": group[0][0], "end": group[-1][1], "text": " ".join(w for _, _, w in group)}
+            for group in (words[i : i + 12] for i in range(0, len(words), 12))
+        ]
+
+
+class StubLLM:
+    """llama.cpp stand-in: whitespace tokenizer and canned notes, one bullet per 20 input lines."""
+
+    def __init__(self, tokens_per_sec: float = 0.0):
+        self.tokens_per_sec = tokens_per_sec
+        self.latencies: List[float] = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> List[bytes]:
+        return text.split()
+
+    def detokenize(self, tokens: List[bytes]) -> bytes:
+        return b" ".join(tokens)
+
+    def create_chat_completion(self, messages, max_tokens: int = 256, stream: bool = False, **_):
+        t0 = time.perf_counter()
+        prompt = "\n".join(m["content"] for m in messages)
+        lines = [ln for ln in prompt.splitlines() if ln.startswith(("[", "-"))]
+        items = [f"- {ln[:60]}" for ln in lines[::20]] or ["- (nothing)"]
+        text = "\n".join(["Main points", *items, "Discussion points", *items[:2], "Action items", *items[:1]])
+        text = " ".join(text.split(" ")[:max_tokens])
+        self.prompt_tokens += len(prompt.split())
+        self.completion_tokens += len(text.split())
+        if self.tokens_per_sec:
+            time.sleep(len(text.split()) / self.tokens_per_sec)
+        self.latencies.append(time.perf_counter() - t0)
+        if stream:
+            pieces = text.split(" ")
+            return iter(
+                [{"choices": [{"delta": {"content": p + (" " if i < len(pieces) - 1 else "")}}]} for i, p in enumerate(pieces)]
+            )
+        return {"choices": [{"message": {"content": text}}]}
+
+
+def run_bench(
+    seconds: float = 300.0,
+    stages: Iterable[str] = STAGES,
+    seed: int = 0,
+    asr_rtf: float = 0.0,
+    llm_tokens_per_sec: float = 0.0,
+    live_speed: float = 100.0,
+) -> Dict[str, Any]:
+    """Run the selected stages on ``seconds`` of synthetic audio; return a JSON-able report.
+
+    Stages use the stub backends above and bypass every cache, so results
+    depend only on the code under test and the machine. ``record_chunks`` is
+    fed at ``live_speed`` x real time; windows it had to skip show up as
+    ``windows`` < ``expected_windows``.
+    """
+    stages = [s for s in STAGES if s in set(stages)]
+    report: Dict[str, Any] = {
+        "bench_version": BENCH_VERSION,
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "audio_sec": float(seconds),
+        "seed": seed,
+        "asr_rtf": asr_rtf,
+        "llm_tokens_per_sec": llm_tokens_per_sec,
+        "stages": {},
+    }
+    audio = synth_meeting(seconds, seed=seed)
+    spawns: Counter = Counter()
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp, _count_spawns(spawns):
+        tmp_dir = Path(tmp)
+        segments: Optional[List[Dict]] = None
+        for stage in stages:
+            if stage == "startup":
+                report["stages"][stage] = _bench_startup()
+            elif stage == "transcribe_file":
+                report["stages"][stage], segments = _bench_transcribe(audio, tmp_dir, asr_rtf)
+            elif stage == "merge_segments":
+                report["stages"][stage] = _bench_merge(audio)
+            elif stage == "record_chunks":
+                report["stages"][stage] = _bench_record(audio, tmp_dir, asr_rtf, live_speed)
+            elif stage == "summarize":
+                if segments is None:
+                    segments = _window_segments(audio)[1]
+                report["stages"][stage] = _bench_summarize(segments, seconds, llm_tokens_per_sec)
+    report["spawns"] = dict(spawns, total=sum(spawns.values()))
+    report["peak_rss_mb"] = _peak_rss_mb(children=False)
+    report["children_peak_rss_mb"] = _peak_rss_mb(children=True)
+    return report
+
+
+def _bench_startup(repeat: int = 5) -> Dict[str, Any]:
+    # Fresh interpreters: what a user waits for before a command does anything
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(Path(__file__).resolve().parents[1]), env.get("PYTHONPATH")]))
+    probe = (
+        "import json, sys\n"
+        "import meeting_notes.cli, meeting_notes.pipeline.summarizer\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    commands = {
+        "help": [sys.executable, "-m", "meeting_notes.cli", "--help"],
+        # Everything `summarize` imports before it loads the LLM
+        "summarize_imports": [sys.executable, "-c", probe],
+    }
+    out: Dict[str, Any] = {}
+    wall = 0.0
+    for name, cmd in commands.items():
+        lat = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            res = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+            lat.append(time.perf_counter() - t0)
+        wall += sum(lat)
+        out[name] = _latency_stats(lat)
+        if name == "summarize_imports":
+            out["heavy_modules"] = json.loads(res.stdout)
+    return {"wall_sec": wall, **out}
+
+
+def _bench_transcribe(audio: np.ndarray, tmp_dir: Path, asr_rtf: float):
+    from meeting_notes.pipeline.asr_engine import transcribe_file
+
+    if shutil.which("ffmpeg") is None:
+        return {"skipped": "ffmpeg not found"}, None
+    wav = write_wav(tmp_dir / "meeting.wav", audio)
+    cfg = _asr_config()
+    backend = StubASR(rtf=asr_rtf)
+    t0 = time.perf_counter()
+    segments = transcribe_file(wav, backend=backend, cfg=cfg)
+    wall = time.perf_counter() - t0
+    seconds = audio.shape[0] / SAMPLE_RATE
+    out = {"wall_sec": wall, "rtf": wall / seconds, "segments": len(segments)}
+    out["infer"] = _latency_stats(backend.latencies)
+    return out, segments
+
+
+def _bench_merge(audio: np.ndarray) -> Dict[str, Any]:
+    from meeting_notes.pipeline.stitcher import Stitcher
+
+    # merge_segments is a wrapper around Stitcher; time the incremental form callers use
+    windows, _ = _window_segments(audio, stitch=False)
+    stitcher = Stitcher()
+    lat = []
+    t0 = time.perf_counter()
+    for new in windows:
+        t1 = time.perf_counter()
+        stitcher.extend(new)
+        lat.append(time.perf_counter() - t1)
+    wall = time.perf_counter() - t0
+    out = {"wall_sec": wall, "rtf": wall / (audio.shape[0] / SAMPLE_RATE), "segments": len(stitcher)}
+    out["extend"] = _latency_stats(lat)
+    out["words_lost"] = _stitch_words_lost()
+    return out
+
+
+# One chunk each: back-to-back short repeats are speech, not chunk overlap
+_SHORT_REPEATS = [
+    [
+        {"start": 0.0, "end": 3.0, "text": "I think we should do it."},
+        {"start": 3.2, "end": 3.6, "text": "Do it."},
+        {"start": 3.8, "end": 4.1, "text": "Yes."},
+        {"start": 4.2, "end": 4.5, "text": "Yes."},
+    ],
+    [{"start": 0.0, "end": 1.0, "text": "So we agree"}, {"start": 1.1, "end": 1.5, "text": "agree"}],
+]
+
+
+def _stitch_words_lost() -> int:
+    from meeting_notes.pipeline.stitcher import Stitcher
+
+    lost = 0
+    for chunk in _SHORT_REPEATS:
+        kept = Stitcher().extend([dict(s) for s in chunk])
+        lost += sum(len(s["text"].split()) for s in chunk) - sum(len(s["text"].split()) for s in kept)
+    return lost
+
+
+def _bench_record(audio: np.ndarray, tmp_dir: Path, asr_rtf: float, speed: float) -> Dict[str, Any]:
+    from meeting_notes.pipeline.audio_utils import record_chunks
+    from meeting_notes.pipeline.stitcher import Stitcher
+
+    cfg = _asr_config()
+    ch = cfg.get("chunking", {})
+    backend = StubASR(rtf=asr_rtf)
+    stitcher = Stitcher()
+    block = SAMPLE_RATE // 2
+
+    def _source() -> Iterator[np.ndarray]:
+        # Paced like a microphone running ``speed`` times faster than real time
+        for i in range(0, audio.shape[0], block):
+            time.sleep(block / SAMPLE_RATE / speed)
+            yield audio[i : i + block]
+
+    windows = record_chunks(
+        tmp_dir / "live",
+        int(ch.get("segment_sec", 20)),
+        int(ch.get("overlap_sec", 2)),
+        sr=SAMPLE_RATE,
+        as_arrays=True,
+        source=_source(),
+    )
+    lat = []
+    count = 0
+    t0 = time.perf_counter()
+    for start, window in windows:
+        t1 = time.perf_counter()
+        new = backend.transcribe(window)
+        for s in new:
+            s["start"] += start
+            s["end"] += start
+        stitcher.extend(new)
+        lat.append(time.perf_counter() - t1)
+        count += 1
+    wall = time.perf_counter() - t0
+    out = {"wall_sec": wall, "speed": speed, "windows": count, "expected_windows": int(audio.shape[0] // SAMPLE_RATE)}
+    out["window"] = _latency_stats(lat)
+    return out
+
+
+def _bench_summarize(segments: List[Dict], seconds: float, tokens_per_sec: float) -> Dict[str, Any]:
+    from meeting_notes.pipeline.summarizer import LLM_CONFIG_PATH, summarize
+    from meeting_notes.pipeline.io_utils import load_yaml
+
+    cfg = load_yaml(LLM_CONFIG_PATH) if LLM_CONFIG_PATH.exists() else {}
+    cfg["summary_cache"] = {"enabled": False}
+    cfg["prefix_cache"] = {"enabled": False}
+    llm = StubLLM(tokens_per_sec=tokens_per_sec)
+    t0 = time.perf_counter()
+    notes, _ = summarize(segments, llm=llm, cfg=cfg)
+    wall = time.perf_counter() - t0
+    return {
+        "wall_sec": wall,
+        "rtf": wall / seconds,
+        "llm_calls": len(llm.latencies),
+        "prompt_tokens": llm.prompt_tokens,
+        "completion_tokens": llm.completion_tokens,
+        "items": sum(len(notes[k]) for k in ("main_points", "discussion_points", "action_items")),
+        "call": _latency_stats(llm.latencies),
+    }
+
+
+def _window_segments(audio: np.ndarray, stitch: bool = True):
+    """Stub-transcribe fixed 20 s windows with 2 s overlap, as the live window mode does."""
+    from meeting_notes.pipeline.stitcher import Stitcher
+
+    backend = StubASR()
+    seg, step = 20 * SAMPLE_RATE, 18 * SAMPLE_RATE
+    windows = []
+    for a in range(0, max(1, audio.shape[0] - 2 * SAMPLE_RATE), step):
+        new = backend.transcribe(audio[a : a + seg])
+        for s in new:
+            s["start"] += a / SAMPLE_RATE
+            s["end"] += a / SAMPLE_RATE
+        windows.append(new)
+    if not stitch:
+        return windows, None
+    stitcher = Stitcher()
+    for new in windows:
+        stitcher.extend([dict(s) for s in new])
+    return windows, stitcher.segments
+
+
+def _asr_config() -> Dict:
+    from meeting_notes.pipeline.asr_engine import ASR_CONFIG_PATH
+    from meeting_notes.pipeline.io_utils import load_yaml
+    from meeting_notes.pipeline.profiles import backend_defaults
+
+    # Per-backend defaults, but never a device's tuned profile: runs stay comparable across machines
+    cfg = backend_defaults(load_yaml(ASR_CONFIG_PATH)) if ASR_CONFIG_PATH.exists() else {}
+    cfg["cache"] = {"enabled": False}
+    return cfg
+
+
+def _latency_stats(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"calls": 0}
+    ms = np.asarray(values) * 1000
+    return {
+        "calls": len(values),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+@contextmanager
+def _count_spawns(counter: Counter) -> Iterator[None]:
+    """Count child processes by program name (``subprocess.run`` etc. all go through ``Popen``)."""
+    original = subprocess.Popen
+
+    class _CountingPopen(original):  # type: ignore[misc, valid-type]
+        def __init__(self, args, *a, **k):
+            prog = args[0] if isinstance(args, (list, tuple)) else str(args).split()[0]
+            counter[Path(str(prog)).name] += 1
+            super().__init__(args, *a, **k)
+
+    subprocess.Popen = _CountingPopen  # type: ignore[misc]
+    try:
+        yield
+    finally:
+        subprocess.Popen = original  # type: ignore[misc]
+
+
+def _peak_rss_mb(children: bool = False) -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _read_wav(path) -> np.ndarray:
+    with wave.open(str(path), "rb") as w:
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+    return pcm.astype(np.float32) / 32768.0
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"bench v{report['bench_version']} @ {report.get('git') or '?'}: {report['audio_sec']:.0f}s synthetic audio"]
+    for name, st in report["stages"].items():
+        if "skipped" in st:
+            lines.append(f"  {name:16s} skipped ({st['skipped']})")
+            continue
+        lat = next((v for v in st.values() if isinstance(v, dict) and "p50_ms" in v), None)
+        pct = f" | p50 {lat['p50_ms']:.1f}ms p90 {lat['p90_ms']:.1f}ms p99 {lat['p99_ms']:.1f}ms" if lat else ""
+        if "rtf" in st:
+            rtf = f"RTF {st['rtf']:.4f}"
+        elif "windows" in st:
+            rtf = f"{st['windows']}/{st['expected_windows']} windows"
+        else:
+            rtf = f"heavy imports: {', '.join(st.get('heavy_modules', [])) or 'none'}"
+        lines.append(f"  {name:16s} {st['wall_sec']:.3f}s  {rtf}{pct}")
+    lines.append(f"  peak RSS {report['peak_rss_mb']} MB | spawns {report['spawns']}")
+    return "\n".join(lines)
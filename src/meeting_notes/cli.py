@@ -1,69 +1,336 @@
 import json
+import sys
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 
-from meeting_notes.pipeline.asr_engine import transcribe_file, transcribe_live
-from meeting_notes.pipeline.summarizer import summarize
+# Keep module-level imports to the standard library and the daemon client: each
+# command imports its pipeline modules itself, so `--help` or `summarize` never
+# pays for NumPy, audio devices or ASR frameworks.
+from meeting_notes.server import DEFAULT_HOST, DEFAULT_PORT, DaemonBackend, daemon_available, submit_job
 
 
 app = typer.Typer(help="Meeting notes CLI: ASR + summarization")
+cache_app = typer.Typer(help="Inspect or clear the transcript cache")
+app.add_typer(cache_app, name="cache")
 
 
 @app.command("asr-file")
 def asr_file(
     path: str = typer.Argument(..., help="Path to media file (audio/video)"),
     out: str = typer.Option("data/tmp/run1", "--out", help="Output directory"),
+    daemon: bool = typer.Option(True, "--daemon/--no-daemon", help="Use a running `serve` daemon if available"),
+    resume: bool = typer.Option(False, "--resume", help="Checkpoint chunks into --out, reusing those an interrupted --resume run finished"),
 ):
-    segments = transcribe_file(path)
-    outdir = Path(out)
-    outdir.mkdir(parents=True, exist_ok=True)
-    (outdir / "transcript.json").write_text(
-        json.dumps({"segments": segments}, indent=2, ensure_ascii=False)
-    )
-    (outdir / "transcript.txt").write_text("\n".join(
-        f"[{_fmt_ts(s['start'])}-{_fmt_ts(s['end'])}] {s['text']}" for s in segments
-    ))
+    from meeting_notes.pipeline.asr_engine import _load_asr_config
+    from meeting_notes.pipeline.io_utils import write_transcript
+    from meeting_notes.pipeline.metrics import run_metrics, write_metrics
+    from meeting_notes.pipeline.transcript_log import journal_path
+
+    # Chunks are checkpointed here as they finish (with --resume or `journal: true`)
+    journal = journal_path(out, _load_asr_config(profile=False), resume=resume)
+    with run_metrics() as metrics:
+        result = None
+        if daemon and daemon_available():
+            payload = {"path": str(Path(path).resolve()), "journal": str(journal) if journal else None, "resume": resume}
+            try:
+                result = submit_job("transcribe", payload)
+            except PermissionError as e:
+                print(f"[asr] daemon refused the job ({e}); transcribing here")
+        if result is not None:
+            segments, summary = result["segments"], result.get("metrics")
+        else:
+            from meeting_notes.pipeline.asr_engine import transcribe_file
+
+            segments, summary = transcribe_file(path, journal=journal, resume=resume), None
+        outdir = write_transcript(out, segments)
+    if journal is not None:
+        journal.unlink(missing_ok=True)
+    write_metrics(outdir / "metrics.json", "asr-file", summary or metrics.summary())
     print(f"Wrote transcripts to {outdir}")
 
 
+@app.command("asr-batch")
+def asr_batch(
+    inputs: str = typer.Argument(..., help="Directory of recordings or a glob pattern"),
+    out: str = typer.Option("data/tmp/batch", "--out", help="Output root; one subdirectory per file"),
+    workers: int = typer.Option(2, "--workers", help="Parallel worker processes (one model each), or jobs in flight with the daemon"),
+    manifest: Optional[str] = typer.Option(None, "--manifest", help="Manifest path (default: <out>/manifest.json)"),
+    resume: bool = typer.Option(False, "--resume", help="Checkpoint chunks per file, reusing those an interrupted --resume run finished"),
+    daemon: bool = typer.Option(True, "--daemon/--no-daemon", help="Send files to a running `serve` daemon (batch priority) if available"),
+):
+    from meeting_notes.pipeline.batch import expand_inputs, run_batch
+
+    files = expand_inputs(inputs)
+    if not files:
+        raise typer.BadParameter(f"No media files found for {inputs!r}")
+    use_daemon = daemon and daemon_available()
+    if use_daemon:
+        print("[batch] using the serve daemon; live sessions go first")
+    result = run_batch(
+        files,
+        Path(out),
+        workers=workers,
+        manifest=Path(manifest) if manifest else None,
+        resume=resume,
+        daemon=use_daemon,
+    )
+    print(
+        f"Transcribed {result['files'] - result['failed']}/{result['files']} files "
+        f"in {result['wall_sec']:.1f}s; manifest in {manifest or Path(out) / 'manifest.json'}"
+    )
+
+
 @app.command("asr-live")
 def asr_live(
     out: str = typer.Option("data/tmp/live1", "--out", help="Output directory"),
     duration: Optional[int] = typer.Option(None, help="Optional max duration in seconds"),
+    notes: bool = typer.Option(False, "--notes/--no-notes", help="Keep notes.md updated while recording"),
+    inputs: Optional[List[str]] = typer.Option(
+        None,
+        "--input",
+        "-i",
+        help="Live input, repeatable: \\[name=]mic[:device]\\[#channel] or \\[name=]file:path (one shared model; output in <out>/<name>)",
+    ),
+    speed: float = typer.Option(1.0, "--speed", help="Playback speed for file: inputs (0 = as fast as the model keeps up)"),
+    daemon: bool = typer.Option(True, "--daemon/--no-daemon", help="Run inference in a `serve` daemon if available"),
 ):
+    from meeting_notes.pipeline.metrics import run_metrics, write_metrics
+    from meeting_notes.pipeline.summarizer import RollingSummarizer
+
+    names = _stream_names(inputs) if inputs else []
+    if notes and len(names) > 1:
+        raise typer.BadParameter("--notes supports a single input")
     outdir = Path(out)
     outdir.mkdir(parents=True, exist_ok=True)
-    segments = transcribe_live(outdir, duration_sec=duration)
-    (outdir / "transcript.json").write_text(
-        json.dumps({"segments": segments}, indent=2, ensure_ascii=False)
-    )
-    (outdir / "transcript.txt").write_text("\n".join(
-        f"[{_fmt_ts(s['start'])}-{_fmt_ts(s['end'])}] {s['text']}" for s in segments
-    ))
-    print(f"Wrote live transcripts to {outdir}")
+    # The daemon schedules live windows ahead of its offline jobs on the shared model
+    backend = DaemonBackend() if daemon and daemon_available() else None
+    with run_metrics() as metrics:
+        notes_dir = outdir / names[0] if names else outdir
+        rolling = RollingSummarizer(notes_dir / "notes.md").start() if notes else None
+        # Segments are appended while recording and compacted into transcript.json at the end
+        try:
+            if inputs:
+                from meeting_notes.pipeline.multistream import transcribe_live_multi
+
+                transcribe_live_multi(
+                    inputs,
+                    outdir,
+                    duration_sec=duration,
+                    on_commit=(lambda _name, segs: rolling.add(segs)) if rolling else None,
+                    speed=speed,
+                    backend=backend,
+                )
+            else:
+                from meeting_notes.pipeline.asr_engine import transcribe_live
+
+                transcribe_live(
+                    outdir, duration_sec=duration, on_commit=rolling.add if rolling else None, backend=backend
+                )
+        finally:
+            if rolling is not None:
+                notes_dict, _ = rolling.finish()
+                (notes_dir / "notes.json").write_text(json.dumps(notes_dict, indent=2, ensure_ascii=False))
+            write_metrics(outdir / "metrics.json", "asr-live", metrics.summary())
+    print(f"Wrote live transcripts to {outdir}" + (" (with notes.md, notes.json)" if rolling else ""))
+
+
+def _stream_names(inputs: List[str]) -> List[str]:
+    from meeting_notes.pipeline.multistream import parse_inputs
+
+    try:
+        return [s.name for s in parse_inputs(inputs)]
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
 
 
 @app.command("summarize")
 def summarize_cmd(
-    transcript: str = typer.Option(..., "--transcript", help="Path to transcript.json"),
+    transcript: str = typer.Option(..., "--transcript", help="Path to transcript.json or transcript.seg"),
     out: str = typer.Option("data/tmp/notes.md", "--out", help="Output markdown file"),
     out_json: str = typer.Option(
         "data/tmp/notes.json", "--out-json", help="Output notes JSON file"
     ),
+    daemon: bool = typer.Option(True, "--daemon/--no-daemon", help="Use a running `serve` daemon if available"),
+    stream: bool = typer.Option(
+        False, "--stream", help="Print notes as they are generated and write notes.md progressively (runs locally)"
+    ),
+    start: Optional[float] = typer.Option(None, "--start", help="Only summarize from this time (seconds)"),
+    end: Optional[float] = typer.Option(None, "--end", help="Only summarize up to this time (seconds)"),
 ):
-    payload = json.loads(Path(transcript).read_text())
-    notes_dict, notes_md = summarize(payload["segments"])
-    Path(out).parent.mkdir(parents=True, exist_ok=True)
-    Path(out).write_text(notes_md)
-    Path(out_json).write_text(json.dumps(notes_dict, indent=2, ensure_ascii=False))
+    from meeting_notes.pipeline.io_utils import load_transcript
+    from meeting_notes.pipeline.metrics import run_metrics, write_metrics
+
+    summary = None
+    with run_metrics() as metrics:
+        segments = load_transcript(transcript, start=start, end=end)
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        if stream:
+            from meeting_notes.pipeline.summarizer import summarize_stream
+
+            with open(out, "w", encoding="utf-8") as md:
+                for event in summarize_stream(segments):
+                    if event["type"] == "token":
+                        sys.stdout.write(event["text"])
+                        sys.stdout.flush()
+                        md.write(event["text"])
+                        md.flush()
+                    elif event["type"] == "done":
+                        notes_dict, notes_md = event["notes"], event["markdown"]
+            print()
+        elif daemon and daemon_available():
+            result = submit_job("summarize", {"segments": list(segments)})
+            notes_dict, notes_md, summary = result["notes"], result["markdown"], result.get("metrics")
+        else:
+            from meeting_notes.pipeline.summarizer import summarize
+
+            notes_dict, notes_md = summarize(segments)
+        Path(out).write_text(notes_md)
+        Path(out_json).write_text(json.dumps(notes_dict, indent=2, ensure_ascii=False))
+    write_metrics(Path(out).parent / "metrics.json", "summarize", summary or metrics.summary())
     print(f"Wrote notes to {out} and {out_json}")
 
 
-def _fmt_ts(x: float) -> str:
-    m, s = divmod(int(x), 60)
-    return f"{m:02d}:{s:02d}"
+@app.command("export")
+def export_cmd(
+    src: str = typer.Argument(..., help="transcript.json or transcript.seg"),
+    out: str = typer.Option(..., "--out", help="Output file; .seg for the binary format, else JSON"),
+    start: Optional[float] = typer.Option(None, "--start", help="Only export from this time (seconds)"),
+    end: Optional[float] = typer.Option(None, "--end", help="Only export up to this time (seconds)"),
+):
+    """Convert a transcript between JSON and the binary segment store, optionally a time range of it."""
+    from meeting_notes.pipeline.io_utils import load_transcript
+    from meeting_notes.pipeline.segments import SUFFIX, SegmentStore
+
+    segments = load_transcript(src, start=start, end=end)
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    if Path(out).suffix == SUFFIX:
+        store = segments if isinstance(segments, SegmentStore) else SegmentStore.from_segments(segments)
+        store.save(out)
+    else:
+        Path(out).write_text(json.dumps({"segments": list(segments)}, indent=2, ensure_ascii=False))
+    print(f"Wrote {len(segments)} segments to {out}")
+
+
+@app.command("serve")
+def serve_cmd(
+    host: str = typer.Option(DEFAULT_HOST, "--host", help="Bind address (keep it local)"),
+    port: int = typer.Option(DEFAULT_PORT, "--port", help="Port to listen on"),
+    preload: bool = typer.Option(False, "--preload", help="Load ASR and LLM models at startup"),
+):
+    """Keep ASR and LLM models resident and serve jobs over localhost HTTP."""
+    from meeting_notes.server import serve
+
+    serve(host=host, port=port, preload=preload)
+
+
+@app.command("bench")
+def bench_cmd(
+    minutes: float = typer.Option(5.0, "--minutes", help="Length of the synthetic recording"),
+    out: str = typer.Option("data/tmp/bench.json", "--out", help="Where to write the JSON report"),
+    stages: Optional[str] = typer.Option(None, "--stages", help="Comma-separated stages to run (default: all)"),
+    seed: int = typer.Option(0, "--seed", help="Seed for the synthetic audio"),
+    asr_rtf: float = typer.Option(0.0, "--asr-rtf", help="Simulated ASR cost as a real-time factor"),
+    llm_tps: float = typer.Option(0.0, "--llm-tps", help="Simulated LLM generation speed (tokens/s, 0 = instant)"),
+    live_speed: float = typer.Option(100.0, "--live-speed", help="Feed the live stage this many times faster than real time"),
+):
+    """Benchmark the pipeline offline on synthetic audio with stub models."""
+    from meeting_notes.bench import STAGES, format_report, run_bench
+
+    selected = stages.split(",") if stages else list(STAGES)
+    unknown = set(selected) - set(STAGES)
+    if unknown:
+        raise typer.BadParameter(f"Unknown stages: {', '.join(sorted(unknown))}")
+    report = run_bench(
+        minutes * 60,
+        stages=selected,
+        seed=seed,
+        asr_rtf=asr_rtf,
+        llm_tokens_per_sec=llm_tps,
+        live_speed=live_speed,
+    )
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    Path(out).write_text(json.dumps(report, indent=2))
+    print(format_report(report))
+    print(f"Wrote benchmark report to {out}")
+
+
+@app.command("tune")
+def tune_cmd(
+    audio: Optional[str] = typer.Option(None, "--audio", help="Calibration recording (default: first file in data/samples, else synthetic)"),
+    seconds: float = typer.Option(60.0, "--seconds", help="Calibration audio length"),
+    segments: str = typer.Option("10,20,30", "--segments", help="Chunk lengths to try (seconds, comma-separated)"),
+    overlaps: str = typer.Option("0,1,2", "--overlaps", help="Chunk overlaps to try (seconds, comma-separated)"),
+    batch_sizes: str = typer.Option("1,4,8", "--batch-sizes", help="Batch sizes to try (comma-separated)"),
+    min_agreement: float = typer.Option(0.97, "--min-agreement", help="Word agreement with the most conservative run required to qualify"),
+    max_mem_mb: Optional[float] = typer.Option(None, "--max-mem-mb", help="Skip settings whose peak memory exceeds this"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Print the results without writing a profile"),
+    force: bool = typer.Option(False, "--force", help="Write a profile even when calibrated on synthetic audio"),
+):
+    """Calibrate chunking and batch size for this device and write a profile that transcription picks up."""
+    from meeting_notes.pipeline.asr_engine import _load_asr_config
+    from meeting_notes.pipeline.profiles import write_profile
+    from meeting_notes.tune import format_tune, run_tune
+
+    cfg = _load_asr_config(profile=False)
+    result = run_tune(
+        seconds=seconds,
+        audio=audio,
+        segments=_int_list(segments, "--segments"),
+        overlaps=_int_list(overlaps, "--overlaps"),
+        batch_sizes=_int_list(batch_sizes, "--batch-sizes"),
+        min_agreement=min_agreement,
+        max_mem_mb=max_mem_mb,
+        cfg=cfg,
+    )
+    print(format_tune(result))
+    settings = result.pop("settings")
+    if dry_run:
+        print(f"Best: {json.dumps(settings)} (not written)")
+        return
+    if result["synthetic"] and not force:
+        # Every setting agrees on synthetic tones, so the fastest (no overlap) would always win
+        print(f"Best: {json.dumps(settings)} (not written: synthetic audio cannot judge chunk joins; pass --audio, or --force)")
+        return
+    path = write_profile(cfg, settings, result)
+    print(f"Wrote {path}; asr-file, asr-live and serve use it on this device")
+
+
+def _int_list(value: str, name: str) -> List[int]:
+    try:
+        out = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise typer.BadParameter(f"{name} takes comma-separated whole seconds/sizes, got {value!r}")
+    if not out:
+        raise typer.BadParameter(f"{name} is empty")
+    return out
+
+
+@cache_app.command("stats")
+def cache_stats():
+    from meeting_notes.pipeline.cache import CACHE_ROOT, ContentCache
+
+    root = CACHE_ROOT
+    namespaces = sorted(p.name for p in root.iterdir() if p.is_dir()) if root.exists() else []
+    if not namespaces:
+        print(f"Cache at {root} is empty")
+    for ns in namespaces:
+        st = ContentCache(ns).stats()
+        print(f"{ns}: {st['entries']} entries, {st['bytes'] / 1e6:.1f} MB")
+
+
+@cache_app.command("clear")
+def cache_clear(
+    namespace: Optional[str] = typer.Option(None, "--namespace", help="Only clear this namespace (e.g. asr-chunks)"),
+):
+    from meeting_notes.pipeline.cache import CACHE_ROOT, ContentCache
+
+    root = CACHE_ROOT
+    namespaces = [namespace] if namespace else ([p.name for p in root.iterdir() if p.is_dir()] if root.exists() else [])
+    for ns in namespaces:
+        ContentCache(ns).clear()
+    print(f"Cleared {', '.join(namespaces) or 'nothing'} in {root}")
 
 
 def main():
@@ -3,49 +3,75 @@ from __future__ import annotations
 import math
 import os
 import subprocess
+import tempfile
+import time
+import wave
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from .audio_utils import ffmpeg_resample_to_wav, record_chunks
+import numpy as np
+
+from .audio_utils import ffmpeg_decode_to_array, ffmpeg_resample_to_wav, iter_decode_pcm, mic_stream, record_chunks
+from .cache import ContentCache, content_key, file_digest
+from .engine import format_stats, run_pipelined
 from .io_utils import load_yaml
-from .stitcher import merge_segments
+from .metrics import current, span
+from .profiles import apply_profile, backend_defaults
+from .stitcher import Stitcher
+from .streaming import make_streamer
+from .transcript_log import ChunkJournal, TranscriptLog
+from .vad import make_vad
 
 
 ASR_CONFIG_PATH = Path("configs/asr.yaml")
+SCRATCH_ROOT = Path("data/tmp/asr")
+# Bump when stitching changes so cached whole-file transcripts are recomputed
+STITCH_VERSION = 4
+SAMPLE_RATE = 16000
+# Below this share of speech the VAD pre-pass more likely misjudged the level than the meeting was silent
+LOW_SPEECH_FRACTION = 0.05
+
+# Backends accept either a WAV path or a mono float32 array at SAMPLE_RATE
+AudioInput = Union[str, np.ndarray]
 
 
-def _load_asr_config() -> Dict:
-    return load_yaml(ASR_CONFIG_PATH)
+def _load_asr_config(profile: bool = True) -> Dict:
+    # Per-backend defaults, then tuned chunking/batch settings for this device (`meeting-notes tune`)
+    cfg = backend_defaults(load_yaml(ASR_CONFIG_PATH))
+    return apply_profile(cfg) if profile else cfg
 
 
 class _ASRBackend:
-    def __init__(self, model_name: str, device: str, vad: bool, model_dir: Optional[str] = None, language: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str,
+        device: str,
+        vad: bool,
+        model_dir: Optional[str] = None,
+        language: Optional[str] = None,
+        backend_name: str = "faster-whisper",
+    ):
         self.model_name = model_name
         self.device = device
         self.vad = vad
         self.language = language
         self.model_dir = model_dir
         self.backend = None
-        self.backend_name = None
+        self.backend_name = backend_name
         self._init_backend()
 
     def _init_backend(self):
-        # Try CrisperWhisper first
-        try:
+        if self.backend_name == "crisper-whisper":
             import crisper_whisper as cw  # type: ignore
 
-            # Hypothetical initialization API - if unavailable, falls back
+            # Hypothetical initialization API
             self.backend = cw.load_model(
                 self.model_name,
                 device=self.device if self.device != "auto" else None,
                 model_dir=self.model_dir,
             )
-            self.backend_name = "crisper-whisper"
             return
-        except Exception:
-            pass
 
-        # Fallback to faster-whisper
         from faster_whisper import WhisperModel  # type: ignore
 
         kwargs = {}
@@ -53,9 +79,18 @@ class _ASRBackend:
             kwargs["download_root"] = self.model_dir
         dev = None if self.device == "auto" else self.device
         self.backend = WhisperModel(self.model_name, device=dev or "cpu", compute_type="int8", **kwargs)
-        self.backend_name = "faster-whisper"
 
-    def transcribe(self, wav_path: str, language: Optional[str] = None, vad: Optional[bool] = None) -> List[Dict]:
+    def transcribe_batch(
+        self,
+        audios: List[AudioInput],
+        language: Optional[str] = None,
+        vad: Optional[bool] = None,
+        **_: object,
+    ) -> List[List[Dict]]:
+        # Whisper backends decode one input at a time; keep the batch API uniform.
+        return [self.transcribe(a, language=language, vad=vad) for a in audios]
+
+    def transcribe(self, wav_path: AudioInput, language: Optional[str] = None, vad: Optional[bool] = None) -> List[Dict]:
         language = language or self.language
         vad = self.vad if vad is None else vad
 
@@ -84,19 +119,51 @@ class _ASRBackend:
             })
         return segments
 
+    def transcribe_words(
+        self,
+        audio: AudioInput,
+        language: Optional[str] = None,
+        vad: Optional[bool] = None,
+        prompt: Optional[str] = None,
+    ) -> List[Tuple[float, float, str]]:
+        """Return (start, end, word) tuples; used by streaming live mode."""
+        language = language or self.language
+        if self.backend_name == "crisper-whisper":
+            return _spread_words(self.transcribe(audio, language=language, vad=vad))
+        gen, _info = self.backend.transcribe(
+            audio,
+            language=None if (language in (None, "auto")) else language,
+            vad_filter=bool(self.vad if vad is None else vad),
+            word_timestamps=True,
+            initial_prompt=prompt or None,
+            condition_on_previous_text=False,
+        )
+        words = []
+        for s in gen:
+            for w in s.words or []:
+                words.append((float(w.start), float(w.end), w.word.strip()))
+        return words
+
 
 class _NemoBackend:
     """ASR backend powered by NVIDIA NeMo containers.
 
     This backend expects NeMo to be importable (i.e., running inside the NeMo container).
-    It returns a single segment per input file with best-effort timestamps.
+    With ``timestamps`` on, word timestamps are requested from the decoder and each
+    input comes back as several segments carrying their ``words``; otherwise (or if
+    the model has none) it is a single segment spanning the input.
     """
 
-    def __init__(self, model_name: str, device: str = "auto"):
+    def __init__(self, model_name: str, device: str = "auto", timestamps: bool = True):
         self.model_name = model_name
         self.device = device
+        self.timestamps = timestamps
         self.backend = None
         self.backend_name = "nemo"
+        # NeMo >= 2.0 takes ``timestamps=True`` in transcribe(); older releases need
+        # compute_timestamps switched on in the decoding config instead
+        self._timestamps_arg = True
+        self._frame_sec = 0.08
         self._init_backend()
 
     def _init_backend(self) -> None:
@@ -108,121 +175,663 @@ class _NemoBackend:
             raise RuntimeError(
                 "NeMo is not available. Run inside the NeMo container (nvcr.io/nvidia/nemo) or install NeMo."
             ) from e
+        try:
+            # Encoder frame length; converts frame offsets from older NeMo releases to seconds
+            stride = float(self.backend.cfg.preprocessor.window_stride)
+            self._frame_sec = stride * int(getattr(self.backend.encoder, "subsampling_factor", 8))
+        except Exception:
+            pass
 
-    def transcribe(self, audio_path: str, **_: object) -> List[Dict]:
+    def transcribe(self, audio_path: AudioInput, **_: object) -> List[Dict]:
+        return self.transcribe_batch([audio_path])[0]
+
+    def transcribe_batch(
+        self,
+        audios: List[AudioInput],
+        batch_size: int = 1,
+        durations: Optional[List[float]] = None,
+        **_: object,
+    ) -> List[List[Dict]]:
+        """Transcribe several inputs in one ``ASRModel.transcribe`` call.
+
+        Inputs are file paths or float32 arrays (all of one kind). Returns one
+        segment list per input, in input order. ``durations`` is only used when
+        the model gives no timestamps; WAV headers are read if it is missing.
+        """
+        if not audios:
+            return []
         # NeMo transcribe API can return strings or Hypothesis objects depending on version.
-        outs = self.backend.transcribe([audio_path], return_hypotheses=True)
-
-        def _to_text(x) -> str:
+        outs = self._transcribe(list(audios), max(1, int(batch_size)))
+        # Older RNNT models return (best_hypotheses, all_hypotheses)
+        if isinstance(outs, tuple) and len(outs) == 2 and len(outs[0]) == len(audios):
+            outs = outs[0]
+
+        results: List[List[Dict]] = []
+        for i, audio in enumerate(audios):
+            hyp = outs[i] if i < len(outs) else ""
+            words = _nemo_words(hyp, self._frame_sec) if self.timestamps else None
+            if words is not None:
+                results.append(_words_to_segments(words))
+                continue
+            if durations is not None:
+                dur = durations[i]
+            elif isinstance(audio, np.ndarray):
+                dur = audio.shape[0] / SAMPLE_RATE
+            else:
+                dur = _wav_duration(Path(audio))
+            results.append([{"start": 0.0, "end": float(dur or 0.0), "text": _hyp_to_text(hyp)}])
+        return results
+
+    def _transcribe(self, audios: List[AudioInput], batch_size: int):
+        if self.timestamps and self._timestamps_arg:
             try:
-                if isinstance(x, str):
-                    return x.strip()
-                if isinstance(x, (list, tuple)) and x:
-                    return _to_text(x[0])
-                # Hypothesis-like
-                txt = getattr(x, "text", None)
-                if isinstance(txt, str):
-                    return txt.strip()
-            except Exception:
-                pass
-            return str(x).strip()
-
-        text = _to_text(outs[0]) if outs else ""
-        dur = _probe_duration(Path(audio_path))
-        return [{"start": 0.0, "end": float(dur or 0.0), "text": text}]
-
-
-def transcribe_file(path: str | Path) -> List[Dict]:
-    cfg = _load_asr_config()
-    backend_choice = str(cfg.get("backend", "whisper")).lower()
-    if backend_choice == "nemo":
-        model_any = _NemoBackend(
-            model_name=cfg.get("model", "stt_en_fastconformer_transducer_large"),
-            device=cfg.get("device", "auto"),
-        )
-    else:
-        model_any = _ASRBackend(
+                return self.backend.transcribe(audios, batch_size=batch_size, return_hypotheses=True, timestamps=True)
+            except TypeError:
+                self._timestamps_arg = False
+                self._enable_decoder_timestamps()
+        return self.backend.transcribe(audios, batch_size=batch_size, return_hypotheses=True)
+
+    def _enable_decoder_timestamps(self) -> None:
+        try:
+            from omegaconf import open_dict  # type: ignore
+
+            decoding = self.backend.cfg.decoding
+            with open_dict(decoding):
+                decoding.compute_timestamps = True
+                decoding.preserve_alignments = True
+            self.backend.change_decoding_strategy(decoding)
+        except Exception as e:  # pragma: no cover - environment dependent
+            print(f"[asr] NeMo model gives no word timestamps ({e}); using one segment per chunk")
+            self.timestamps = False
+
+    def transcribe_words(self, audio: AudioInput, **_: object) -> List[Tuple[float, float, str]]:
+        segments = self.transcribe(audio)
+        if segments and all(s.get("words") for s in segments):
+            return [(float(a), float(b), w) for s in segments for a, b, w in s["words"]]
+        return _spread_words(segments)
+
+
+def _nemo_words(hyp, frame_sec: float) -> Optional[List[List]]:
+    """[start, end, word] in seconds from a NeMo Hypothesis, or None without timestamps."""
+    ts = getattr(hyp, "timestamp", None) or getattr(hyp, "timestep", None)
+    if not isinstance(ts, dict) or "word" not in ts:
+        return None
+    words = []
+    for w in ts["word"]:
+        text = str(w.get("word", "")).strip()
+        if not text:
+            continue
+        if "start" in w and "end" in w:
+            start, end = float(w["start"]), float(w["end"])
+        else:
+            start, end = float(w["start_offset"]) * frame_sec, float(w["end_offset"]) * frame_sec
+        words.append([round(start, 3), round(max(start, end), 3), text])
+    return words
+
+
+def _words_to_segments(words: List[List], max_gap: float = 0.8, max_words: int = 40) -> List[Dict]:
+    # Break at pauses and sentence ends so segments stay short enough to read and stitch
+    segments: List[Dict] = []
+    cur: List[List] = []
+    for w in words:
+        if cur and (w[0] - cur[-1][1] > max_gap or len(cur) >= max_words or cur[-1][2][-1] in ".?!"):
+            segments.append({"start": cur[0][0], "end": cur[-1][1], "text": " ".join(x[2] for x in cur), "words": cur})
+            cur = []
+        cur.append(w)
+    if cur:
+        segments.append({"start": cur[0][0], "end": cur[-1][1], "text": " ".join(x[2] for x in cur), "words": cur})
+    return segments
+
+
+def _shift_segments(segments: List[Dict], offset: float) -> None:
+    """Move chunk-relative segment (and word) times to stream time, in place."""
+    for s in segments:
+        s["start"] += offset
+        s["end"] += offset
+        if s.get("words"):
+            s["words"] = [[round(a + offset, 3), round(b + offset, 3), w] for a, b, w in s["words"]]
+
+
+def _spread_words(segments: List[Dict]) -> List[Tuple[float, float, str]]:
+    # Segment-level backends: assume words are evenly spaced within each segment
+    words = []
+    for s in segments:
+        toks = s["text"].split()
+        if not toks:
+            continue
+        step = (float(s["end"]) - float(s["start"])) / len(toks)
+        for i, w in enumerate(toks):
+            words.append((float(s["start"]) + i * step, float(s["start"]) + (i + 1) * step, w))
+    return words
+
+
+def _hyp_to_text(x) -> str:
+    try:
+        if isinstance(x, str):
+            return x.strip()
+        if isinstance(x, (list, tuple)) and x:
+            return _hyp_to_text(x[0])
+        # Hypothesis-like
+        txt = getattr(x, "text", None)
+        if isinstance(txt, str):
+            return txt.strip()
+    except Exception:
+        pass
+    return str(x).strip()
+
+
+def _load_nemo(cfg: Dict) -> _NemoBackend:
+    return _NemoBackend(
+        model_name=cfg.get("model", "stt_en_fastconformer_transducer_large"),
+        device=cfg.get("device", "auto"),
+        timestamps=bool(cfg.get("word_timestamps", True)),
+    )
+
+
+def _whisper_loader(name: str) -> Callable[[Dict], _ASRBackend]:
+    def _load(cfg: Dict) -> _ASRBackend:
+        return _ASRBackend(
             model_name=cfg.get("model", "large-v3"),
             device=cfg.get("device", "auto"),
             vad=bool(cfg.get("vad", True)),
             model_dir=str(Path("data/models/asr").absolute()),
             language=cfg.get("language", "auto"),
+            backend_name=name,
         )
 
-    # Convert input to 16k mono WAV
-    tmp_dir = Path("data/tmp/asr"); tmp_dir.mkdir(parents=True, exist_ok=True)
-    wav_path = tmp_dir / "input.wav"
-    ffmpeg_resample_to_wav(path, wav_path)
+    return _load
+
+
+# ``backend`` in configs/asr.yaml -> loader. Each loader imports only its own
+# framework, so the configured backend is resolved without probing the others.
+ASR_BACKENDS: Dict[str, Callable[[Dict], object]] = {
+    "nemo": _load_nemo,
+    "faster-whisper": _whisper_loader("faster-whisper"),
+    "whisper": _whisper_loader("faster-whisper"),
+    "crisper-whisper": _whisper_loader("crisper-whisper"),
+}
 
-    # If chunking requested, slice via ffmpeg and stitch results
-    ch = cfg.get("chunking", {})
-    seg_sec = int(ch.get("segment_sec", 20))
-    ov_sec = int(ch.get("overlap_sec", 2))
 
-    if seg_sec > 0:
-        segments: List[Dict] = []
-        duration = _probe_duration(wav_path)
-        step = seg_sec - ov_sec
-        t = 0.0
-        idx = 0
-        while t < duration:
+def build_backend(cfg: Optional[Dict] = None):
+    cfg = cfg if cfg is not None else _load_asr_config()
+    backend_choice = str(cfg.get("backend", "whisper")).lower()
+    loader = ASR_BACKENDS.get(backend_choice)
+    if loader is None:
+        raise ValueError(f"Unknown ASR backend {backend_choice!r}; expected one of {', '.join(sorted(ASR_BACKENDS))}")
+    with span("asr.load"):
+        return loader(cfg)
+
+
+def _chunk_windows(duration: float, seg_sec: int, ov_sec: int) -> List[Tuple[float, float]]:
+    """Return (start, end) windows covering ``duration`` with ``ov_sec`` of left context."""
+    windows: List[Tuple[float, float]] = []
+    step = seg_sec - ov_sec
+    t = 0.0
+    while t < duration:
+        start = max(0.0, t - ov_sec)
+        end = min(duration, t + seg_sec)
+        windows.append((start, end))
+        t += step
+    return windows
+
+
+def _iter_pcm_windows(
+    blocks: Iterable[np.ndarray], seg_sec: int, ov_sec: int, sr: int = SAMPLE_RATE
+) -> Iterator[Tuple[float, float, np.ndarray]]:
+    """Yield the same windows as ``_chunk_windows`` while PCM is still arriving.
+
+    Blocks are copied into a sliding buffer that only holds audio from the
+    next window's start on, so memory does not grow with the recording; each
+    window is a view into it, emitted as soon as its samples are available.
+    """
+    buf = np.empty(int(4 * (seg_sec + ov_sec) * sr), dtype=np.float32)
+    base = 0  # sample index of buf[0]
+    n = 0
+    step = seg_sec - ov_sec
+    t = 0.0
+    for block in blocks:
+        buf, base = _slide(buf, base, n, int(max(0.0, t - ov_sec) * sr), block.shape[0])
+        buf[n - base : n - base + block.shape[0]] = block
+        n += block.shape[0]
+        while (t + seg_sec) * sr <= n:
             start = max(0.0, t - ov_sec)
-            end = min(duration, t + seg_sec)
-            chunk_path = tmp_dir / f"chunk_{idx:04d}.wav"
-            _ffmpeg_trim(wav_path, chunk_path, start, end - start)
-            new = model_any.transcribe(str(chunk_path), language=cfg.get("language"), vad=cfg.get("vad"))
-            # Offset timestamps
-            for s in new:
-                s["start"] += start
-                s["end"] += start
-            segments = merge_segments(segments, new)
-            idx += 1
+            end = t + seg_sec
+            yield start, end, buf[int(start * sr) - base : int(end * sr) - base]
             t += step
-        return segments
-    else:
-        return model_any.transcribe(str(wav_path), language=cfg.get("language"), vad=cfg.get("vad"))
+    duration = n / sr
+    current().gauge("asr.audio_sec", duration)
+    while t < duration:
+        start = max(0.0, t - ov_sec)
+        end = min(duration, t + seg_sec)
+        yield start, end, buf[int(start * sr) - base : int(end * sr) - base]
+        t += step
 
 
-def transcribe_live(outdir: Path, duration_sec: Optional[int] = None) -> List[Dict]:
-    cfg = _load_asr_config()
-    backend_choice = str(cfg.get("backend", "whisper")).lower()
-    if backend_choice == "nemo":
-        model_any = _NemoBackend(
-            model_name=cfg.get("model", "stt_en_fastconformer_transducer_large"),
-            device=cfg.get("device", "auto"),
+def _slide(buf: np.ndarray, base: int, n: int, keep_from: int, extra: int) -> Tuple[np.ndarray, int]:
+    """Make room for ``extra`` samples after sample ``n``, keeping only ``[keep_from, n)``.
+
+    Returns the buffer and the sample index of its first element. A full
+    buffer is replaced rather than compacted in place: windows already
+    yielded are views into it and stay valid until their consumer drops them.
+    """
+    if n - base + extra <= buf.shape[0]:
+        return buf, base
+    keep = n - keep_from
+    fresh = np.empty(max(buf.shape[0], 2 * (keep + extra)), dtype=np.float32)
+    fresh[:keep] = buf[keep_from - base : n - base]
+    return fresh, keep_from
+
+
+def _iter_speech_windows(
+    blocks: Iterable[np.ndarray], seg_sec: int, ov_sec: int, vad, sr: int = SAMPLE_RATE
+) -> Iterator[Tuple[float, float, np.ndarray]]:
+    """Like ``_iter_pcm_windows``, but with chunk boundaries placed by ``vad``.
+
+    Silence between speech regions is skipped. A chunk ends in the last pause
+    that fits within ``seg_sec``; only continuous speech longer than that is
+    cut at a fixed point and overlapped by ``ov_sec``.
+    """
+    seg = int(seg_sec * sr)
+    buf = np.empty(max(sr * 60, 4 * seg), dtype=np.float32)
+    base = 0  # sample index of buf[0]; nothing before pos is needed again
+    n = 0
+    pos = 0
+    edge = int((vad.pad_sec + vad.min_speech_sec) * sr)
+    aligned = False  # pos already sits at a (padded) speech start
+    kept = 0.0
+    blocks = iter(blocks)
+    done = False
+    while True:
+        # Wait for a full analysis window, or the end of the input
+        while not done and n - pos < seg:
+            block = next(blocks, None)
+            if block is None:
+                done = True
+                break
+            buf, base = _slide(buf, base, n, pos, block.shape[0])
+            buf[n - base : n - base + block.shape[0]] = block
+            n += block.shape[0]
+        if n - pos <= 0:
+            break
+        view_len = min(seg, n - pos)
+        final = done and n - pos <= seg
+        with span("vad.detect"):
+            regions = vad.speech_regions(buf[pos - base : pos - base + view_len])
+        if not regions.shape[0]:
+            # Speech starting in the last min_speech_sec (plus padding) is too short to be
+            # detected yet: look at that tail again with the next window
+            pos += view_len if final else max(1, view_len - edge)
+            aligned = False
+            continue
+        if not aligned and regions[0, 0] > 0:
+            pos += int(regions[0, 0] * sr)
+            aligned = True
+            continue
+
+        length = view_len / sr
+        if final:
+            cut, nxt = float(regions[-1, 1]), length
+        elif regions[-1, 1] < length - 0.1:
+            cut, nxt = float(regions[-1, 1]), float(regions[-1, 1])  # trailing pause
+        elif regions.shape[0] > 1:
+            cut, nxt = float(regions[-2, 1]), float(regions[-1, 0])  # cut in the last pause
+        else:
+            cut, nxt = length, length - ov_sec  # continuous speech: fixed cut with overlap
+        start = pos / sr
+        kept += cut
+        yield start, start + cut, buf[pos - base : pos - base + int(cut * sr)]
+        pos += max(1, int(nxt * sr))
+        aligned = nxt != cut
+    current().gauge("asr.audio_sec", n / sr)
+    current().gauge("vad.speech_sec", round(kept, 3))
+    if n:
+        print(f"[vad] sent {kept:.0f}s of {n / sr:.0f}s audio to the model")
+        if n / sr >= 30 and kept < LOW_SPEECH_FRACTION * n / sr:
+            print(
+                f"[vad] warning: only {kept / (n / sr):.1%} of the audio looked like speech; "
+                "if words are missing, lower vad_prepass.threshold_db or margin_db, or disable vad_prepass"
+            )
+
+
+def transcribe_file(
+    path: str | Path,
+    backend: Optional[object] = None,
+    cfg: Optional[Dict] = None,
+    journal: Optional[str | Path] = None,
+    resume: bool = False,
+) -> List[Dict]:
+    """Transcribe a media file into stitched segments.
+
+    ``backend`` lets long-running callers (``serve``, batch workers) reuse a
+    model built with ``build_backend`` instead of loading one per call; ``cfg``
+    overrides ``configs/asr.yaml``. Scratch files go to a private directory
+    under ``data/tmp/asr`` so concurrent runs never collide. With ``journal``
+    each chunk's result is checkpointed there as it finishes, and ``resume``
+    takes finished chunks from it, so a killed job only redoes the
+    unfinished chunks and the stitch.
+    """
+    cfg = cfg if cfg is not None else _load_asr_config()
+    metrics = current()
+    file_cache, chunk_cache = _transcript_caches(cfg)
+    digest = file_digest(path) if file_cache is not None or journal is not None else None
+    if file_cache is not None:
+        file_key = content_key("file", STITCH_VERSION, digest, _cache_settings(cfg, chunking=True))
+        hit = file_cache.get(file_key)
+        metrics.inc("asr.file_cache_hit" if hit is not None else "asr.file_cache_miss")
+        if hit is not None:
+            return hit
+
+    # Only load the model once a chunk actually misses the cache
+    model_any = backend if backend is not None else _LazyBackend(cfg)
+    chunks = None
+    if journal is not None:
+        chunks = ChunkJournal(journal, {"input": digest, "settings": _cache_settings(cfg, chunking=True)}, resume=resume)
+        if chunks.done:
+            print(f"[asr] resuming: {len(chunks.done)} chunks already in {chunks.path.name}")
+    SCRATCH_ROOT.mkdir(parents=True, exist_ok=True)
+    try:
+        with metrics.span("asr.transcribe_file"), tempfile.TemporaryDirectory(prefix="job-", dir=SCRATCH_ROOT) as scratch:
+            segments = _transcribe_file(path, cfg, model_any, Path(scratch), chunk_cache, chunks)
+    finally:
+        if chunks is not None:
+            chunks.close()
+    audio_sec = metrics.gauges.get("asr.audio_sec")
+    if audio_sec:
+        metrics.gauge("asr.rtf", round(metrics.total("asr.transcribe_file") / audio_sec, 4))
+    if file_cache is not None:
+        file_cache.put(file_key, segments)
+    return segments
+
+
+class _LazyBackend:
+    """Builds the configured backend on first use."""
+
+    def __init__(self, cfg: Dict):
+        self._cfg = cfg
+        self._model = None
+
+    def __getattr__(self, name: str):
+        if self._model is None:
+            self._model = build_backend(self._cfg)
+        return getattr(self._model, name)
+
+
+def _transcript_caches(cfg: Dict) -> Tuple[Optional[ContentCache], Optional[ContentCache]]:
+    cc = cfg.get("cache", {})
+    if not bool(cc.get("enabled", False)):
+        return None, None
+    max_mb = float(cc.get("max_mb", 1024))
+    return ContentCache("asr", max_mb=max_mb), ContentCache("asr-chunks", max_mb=max_mb)
+
+
+def _cache_settings(cfg: Dict, chunking: bool = False) -> Dict:
+    # Everything that changes the recognized text; chunk keys already cover the audio window
+    keys = {k: cfg.get(k) for k in ("backend", "model", "language", "vad", "word_timestamps")}
+    if chunking:
+        ch = cfg.get("chunking", {})
+        keys["chunking"] = {k: ch.get(k) for k in ("segment_sec", "overlap_sec")}
+        # The pre-pass only applies to in-memory chunking
+        if bool(ch.get("in_memory", False)):
+            keys["vad_prepass"] = cfg.get("vad_prepass")
+    return keys
+
+
+def _audio_digest(audio: AudioInput) -> str:
+    if isinstance(audio, np.ndarray):
+        return content_key(memoryview(np.ascontiguousarray(audio)).cast("B"))
+    return file_digest(audio)
+
+
+def _transcribe_file(
+    path: str | Path,
+    cfg: Dict,
+    model_any,
+    tmp_dir: Path,
+    chunk_cache: Optional[ContentCache] = None,
+    journal: Optional[ChunkJournal] = None,
+) -> List[Dict]:
+    ch = cfg.get("chunking", {})
+    seg_sec = int(ch.get("segment_sec", 20))
+    in_memory = bool(ch.get("in_memory", False))
+    batch_size = max(1, int(cfg.get("batch_size", 1)))
+
+    if seg_sec <= 0:
+        if in_memory:
+            whole: AudioInput = ffmpeg_decode_to_array(path, sr=SAMPLE_RATE)
+        else:
+            whole = str(tmp_dir / "input.wav")
+            ffmpeg_resample_to_wav(path, whole, sr=SAMPLE_RATE)
+        current().gauge(
+            "asr.audio_sec", whole.shape[0] / SAMPLE_RATE if isinstance(whole, np.ndarray) else _wav_duration(Path(whole))
         )
+        with current().span("asr.infer"):
+            return model_any.transcribe(whole, language=cfg.get("language"), vad=cfg.get("vad"))
+
+    stitcher = Stitcher()
+    settings = _cache_settings(cfg)
+    metrics = current()
+
+    def _infer(item: Tuple[List[Tuple[float, float]], List[AudioInput]]):
+        windows, audios = item
+        results: List[Optional[List[Dict]]] = [None] * len(audios)
+        keys: List[Optional[str]] = [None] * len(audios)
+        if journal is not None:
+            results = [journal.pop(w) for w in windows]
+        new_idx = [i for i, r in enumerate(results) if r is None]
+        resumed = len(windows) - len(new_idx)
+        if chunk_cache is not None:
+            for i, audio in enumerate(audios):
+                if results[i] is None:
+                    keys[i] = content_key("chunk", settings, _audio_digest(audio))
+                    results[i] = chunk_cache.get(keys[i])
+        todo = [i for i, r in enumerate(results) if r is None]
+        metrics.inc("asr.chunks", len(audios))
+        if resumed:
+            metrics.inc("asr.chunks_resumed", resumed)
+        if chunk_cache is not None:
+            metrics.inc("asr.chunk_cache_hit", len(audios) - resumed - len(todo))
+        if todo:
+            with metrics.span("asr.infer"):
+                fresh = model_any.transcribe_batch(
+                    [audios[i] for i in todo],
+                    language=cfg.get("language"),
+                    vad=cfg.get("vad"),
+                    batch_size=batch_size,
+                    durations=[windows[i][1] - windows[i][0] for i in todo],
+                )
+            for i, new in zip(todo, fresh):
+                results[i] = new
+                if chunk_cache is not None:
+                    chunk_cache.put(keys[i], new)
+        if journal is not None:
+            # Checkpoint before stitching shifts the segments to file time
+            journal.add([windows[i] for i in new_idx], [results[i] for i in new_idx])
+        return windows, results
+
+    def _stitch(item) -> None:
+        windows, results = item
+        for (start, _end), new in zip(windows, results):
+            _shift_segments(new, start)
+            stitcher.extend(new)
+
+    batches = _iter_chunk_batches(path, cfg, tmp_dir, skip=journal)
+    pl = cfg.get("pipeline", {})
+    if bool(pl.get("enabled", False)):
+        # Decode/slice and stitch on worker threads while the model stays busy
+        stats = run_pipelined(batches, _infer, _stitch, queue_size=int(pl.get("queue_size", 4)))
+        metrics.info["asr.pipeline"] = stats
+        print(format_stats(stats))
     else:
-        model_any = _ASRBackend(
-            model_name=cfg.get("model", "large-v3"),
-            device=cfg.get("device", "auto"),
-            vad=bool(cfg.get("vad", True)),
-            model_dir=str(Path("data/models/asr").absolute()),
-            language=cfg.get("language", "auto"),
+        for item in batches:
+            _stitch(_infer(item))
+    return stitcher.segments
+
+
+def _iter_chunk_batches(
+    path: str | Path, cfg: Dict, tmp_dir: Path, skip: Optional[ChunkJournal] = None
+) -> Iterator[Tuple[List[Tuple[float, float]], List[AudioInput]]]:
+    """Decode ``path`` and yield (windows, audios) groups of up to ``batch_size`` chunks.
+
+    Windows in ``skip`` (already transcribed) are not cut out as WAV files.
+    """
+    ch = cfg.get("chunking", {})
+    seg_sec = int(ch.get("segment_sec", 20))
+    ov_sec = int(ch.get("overlap_sec", 2))
+    batch_size = max(1, int(cfg.get("batch_size", 1)))
+
+    vad = make_vad(cfg, sr=SAMPLE_RATE)
+    if bool(ch.get("in_memory", False)) and vad is not None:
+        # Chunks follow speech regions; silence never reaches the model
+        chunks: Iterable[Tuple[float, float, AudioInput]] = _iter_speech_windows(
+            iter_decode_pcm(path, sr=SAMPLE_RATE), seg_sec, ov_sec, vad
         )
+    elif bool(ch.get("in_memory", False)):
+        # Decode once through an ffmpeg pipe; chunks are array views
+        chunks = _iter_pcm_windows(iter_decode_pcm(path, sr=SAMPLE_RATE), seg_sec, ov_sec)
+    else:
+        # Convert input to 16k mono WAV and slice via ffmpeg
+        wav_path = tmp_dir / "input.wav"
+        ffmpeg_resample_to_wav(path, wav_path, sr=SAMPLE_RATE)
+        chunks = _iter_trimmed_chunks(wav_path, tmp_dir, seg_sec, ov_sec, skip)
+
+    windows: List[Tuple[float, float]] = []
+    audios: List[AudioInput] = []
+    for start, end, audio in chunks:
+        windows.append((start, end))
+        audios.append(audio)
+        if len(audios) == batch_size:
+            yield windows, audios
+            windows, audios = [], []
+    if audios:
+        yield windows, audios
+
+
+def _iter_trimmed_chunks(
+    wav_path: Path, tmp_dir: Path, seg_sec: int, ov_sec: int, skip: Optional[ChunkJournal] = None
+) -> Iterator[Tuple[float, float, AudioInput]]:
+    duration = _wav_duration(wav_path)
+    current().gauge("asr.audio_sec", duration)
+    for idx, (start, end) in enumerate(_chunk_windows(duration, seg_sec, ov_sec)):
+        if skip is not None and (start, end) in skip:
+            yield start, end, ""
+            continue
+        chunk_path = tmp_dir / f"chunk_{idx:04d}.wav"
+        _ffmpeg_trim(wav_path, chunk_path, start, end - start)
+        yield start, end, str(chunk_path)
+
+
+def transcribe_live(
+    outdir: Path,
+    duration_sec: Optional[int] = None,
+    on_commit: Optional[Callable[[List[Dict]], None]] = None,
+    backend: Optional[object] = None,
+) -> List[Dict]:
+    """Transcribe the microphone until Ctrl+C or ``duration_sec``.
+
+    Committed segments are appended to ``segments.jsonl``/``transcript.txt``
+    as they arrive (and passed to ``on_commit``, e.g. a rolling summarizer);
+    ``transcript.json`` is written once when the session ends. ``backend``
+    replaces the configured model (e.g. the ``serve`` daemon's).
+    """
+    cfg = _load_asr_config()
+    model_any = backend if backend is not None else build_backend(cfg)
+    log = TranscriptLog(outdir, fsync_sec=float(cfg.get("live", {}).get("fsync_sec", 5.0)))
+
+    def _commit(segments: List[Dict]) -> None:
+        log.append(segments)
+        if on_commit is not None and segments:
+            on_commit(segments)
+
+    try:
+        if str(cfg.get("live", {}).get("mode", "window")) == "streaming":
+            _transcribe_live_streaming(cfg, model_any, _commit, duration_sec)
+        else:
+            _transcribe_live_window(outdir, cfg, model_any, _commit, duration_sec)
+    finally:
+        segments = log.compact()
+    return segments
+
+
+def _transcribe_live_window(
+    outdir: Path, cfg: Dict, model_any, commit: Callable[[List[Dict]], None], duration_sec: Optional[int]
+) -> None:
     ch = cfg.get("chunking", {})
     seg_sec = int(ch.get("segment_sec", 20))
     ov_sec = int(ch.get("overlap_sec", 2))
 
-    chunks_dir = outdir / "chunks"
-    chunks_dir.mkdir(parents=True, exist_ok=True)
+    stitcher = Stitcher()
+    vad = make_vad(cfg, sr=SAMPLE_RATE)
+    seen = 0.0
+    try:
+        windows = record_chunks(
+            outdir / "chunks", seg_sec, ov_sec, max_duration_sec=duration_sec, sr=SAMPLE_RATE, as_arrays=True
+        )
+        for start, window in windows:
+            emitted = time.time()
+            end = start + window.shape[0] / SAMPLE_RATE
+            # Audio new since the last window, plus a second of lead-in
+            fresh = window[-min(window.shape[0], int((end - seen + 1.0) * SAMPLE_RATE)) :]
+            seen = end
+            if vad is not None and not vad.has_speech(fresh):
+                current().inc("live.silent_skipped")
+                continue
+            with current().span("asr.infer"):
+                new = model_any.transcribe(window, language=cfg.get("language"), vad=cfg.get("vad"))
+            # Windows are handed over as arrays; shift to stream time before stitching
+            _shift_segments(new, start)
+            kept = stitcher.extend(new)
+            commit(kept)
+            if kept:
+                # The newest audio in the window was captured when it was emitted
+                current().observe("live.latency", time.time() - emitted)
+            print(f"[live] segments: {len(stitcher)} | window @ {start:.1f}s")
+    except KeyboardInterrupt:
+        print("[live] Stopped by user")
+
 
-    all_segments: List[Dict] = []
+def _transcribe_live_streaming(
+    cfg: Dict, model_any, commit: Callable[[List[Dict]], None], duration_sec: Optional[int]
+) -> None:
+    """Feed only new microphone audio to a streamer and append committed text."""
+    live = cfg.get("live", {})
+    block_sec = float(live.get("min_chunk_sec", 1.0))
+    streamer = make_streamer(model_any, cfg, sr=SAMPLE_RATE)
+    # Cache-aware NeMo encodes each frame once anyway; only re-decoding streamers skip silence
+    vad = make_vad(cfg, sr=SAMPLE_RATE) if hasattr(streamer, "skip_silence") else None
+    stitcher = Stitcher()
+    started = time.time()
     try:
-        for chunk in record_chunks(chunks_dir, seg_sec, ov_sec, max_duration_sec=duration_sec, sr=16000):
-            new = model_any.transcribe(str(chunk), language=cfg.get("language"), vad=cfg.get("vad"))
-            # No offset needed; chunk files already include overlap context
-            all_segments = merge_segments(all_segments, new)
-            # Write rolling outputs
-            (outdir / "transcript.json").write_text(
-                __to_json({"segments": all_segments})
-            )
-            (outdir / "transcript.txt").write_text(
-                "\n".join(f"[{_fmt_ts(s['start'])}-{_fmt_ts(s['end'])}] {s['text']}" for s in all_segments)
-            )
-            print(f"[live] segments: {len(all_segments)} | last chunk: {chunk.name}")
+        for block in mic_stream(sr=SAMPLE_RATE, block_sec=block_sec):
+            captured = time.time()
+            if vad is not None and not streamer.pending and not vad.has_speech(block):
+                streamer.skip_silence(block)
+                current().inc("live.silent_skipped")
+                new = []
+            else:
+                streamer.insert_audio(block)
+                with current().span("asr.infer"):
+                    new = stitcher.extend(streamer.process())
+            if new:
+                commit(new)
+                current().observe("live.latency", time.time() - captured)
+                print(
+                    f"[live] segments: {len(stitcher)} | +{len(new)} | "
+                    f"latency {time.time() - captured:.2f}s | {new[-1]['text'][-60:]}"
+                )
+            if duration_sec and (time.time() - started) >= duration_sec:
+                break
     except KeyboardInterrupt:
         print("[live] Stopped by user")
-    return all_segments
+    commit(stitcher.extend(streamer.finish()))
+
+
+def _wav_duration(path: Path) -> float:
+    # Our scratch audio is always WAV: read the header instead of spawning ffprobe
+    try:
+        with wave.open(str(path), "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return _probe_duration(path)
 
 
 def _probe_duration(wav_path: Path) -> float:
@@ -236,7 +845,8 @@ def _probe_duration(wav_path: Path) -> float:
         "default=noprint_wrappers=1:nokey=1",
         str(wav_path),
     ]
-    out = subprocess.check_output(cmd).decode().strip()
+    with span("ffprobe"):
+        out = subprocess.check_output(cmd).decode().strip()
     try:
         return float(out)
     except Exception:
@@ -257,15 +867,5 @@ def _ffmpeg_trim(src: Path, dst: Path, start: float, duration: float) -> None:
         "copy",
         str(dst),
     ]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-
-def __to_json(obj) -> str:
-    import json
-
-    return json.dumps(obj, ensure_ascii=False, indent=2)
-
-
-def _fmt_ts(x: float) -> str:
-    m, s = divmod(int(x), 60)
-    return f"{m:02d}:{s:02d}"
+    with span("ffmpeg.trim"):
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -1,17 +1,16 @@
 from __future__ import annotations
 
 import subprocess
-import sys
+import threading
 import time
+import wave
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator, Optional
+from typing import Generator, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 
-try:
-    import sounddevice as sd
-except Exception:  # pragma: no cover
-    sd = None  # allow environments without audio
+from .metrics import span
 
 
 def ffmpeg_resample_to_wav(src: str | Path, dst_wav: str | Path, sr: int = 16000) -> None:
@@ -28,17 +27,251 @@ def ffmpeg_resample_to_wav(src: str | Path, dst_wav: str | Path, sr: int = 16000
         str(sr),
         str(dst),
     ]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with span("ffmpeg.resample"):
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def ffmpeg_decode_to_array(src: str | Path, sr: int = 16000) -> np.ndarray:
+    """Decode any media file to a mono float32 array at ``sr`` via an ffmpeg pipe.
+
+    No intermediate file is written; slices of the returned array are views.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-i",
+        str(src),
+        "-ac",
+        "1",
+        "-ar",
+        str(sr),
+        "-f",
+        "f32le",
+        "-acodec",
+        "pcm_f32le",
+        "pipe:1",
+    ]
+    with span("ffmpeg.decode"):
+        proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def iter_decode_pcm(src: str | Path, sr: int = 16000, block_sec: float = 10.0) -> Iterator[np.ndarray]:
+    """Stream-decode a media file as mono float32 blocks of ``block_sec`` seconds.
+
+    Unlike ``ffmpeg_decode_to_array`` the caller can start working on the first
+    blocks while ffmpeg is still decoding the rest.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-i",
+        str(src),
+        "-ac",
+        "1",
+        "-ar",
+        str(sr),
+        "-f",
+        "f32le",
+        "-acodec",
+        "pcm_f32le",
+        "pipe:1",
+    ]
+    block_bytes = int(sr * block_sec) * 4
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            # Includes waiting for ffmpeg, i.e. decode time not hidden behind other stages
+            with span("ffmpeg.decode_block"):
+                data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            usable = len(data) - (len(data) % 4)
+            yield np.frombuffer(data[:usable], dtype=np.float32)
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
+def _sounddevice():
+    # Imported on first use: loading PortAudio is slow and only live capture needs it
+    try:
+        import sounddevice as sd
+    except Exception as e:  # pragma: no cover - environments without audio
+        raise RuntimeError("sounddevice is not available in this environment") from e
+    return sd
 
 
 def mic_stream(sr: int = 16000, block_sec: float = 1.0) -> Generator[np.ndarray, None, None]:
-    if sd is None:
-        raise RuntimeError("sounddevice is not available in this environment")
+    sd = _sounddevice()
     blocksize = int(sr * block_sec)
     with sd.InputStream(samplerate=sr, channels=1, dtype="float32", blocksize=blocksize) as stream:
         while True:
+            # read() returns a fresh array per call; no extra copy needed
             frames, _ = stream.read(blocksize)
-            yield frames.copy()
+            yield frames
+
+
+class RingBuffer:
+    """Fixed-capacity circular float32 buffer shared by a capture thread and a reader.
+
+    ``write`` copies into preallocated storage (at most two slice copies, no
+    allocation), so it is cheap enough to run inside an audio callback. A
+    reader that calls ``release`` lets a non-realtime writer wait for room
+    (``wait_for_room``) instead of overwriting audio not yet read.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._pos = 0
+        self.total = 0  # samples ever written
+        self.released = 0  # samples the reader no longer needs
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def write(self, x: np.ndarray) -> None:
+        x = x.reshape(-1)
+        n = x.shape[0]
+        cap = self.capacity
+        with self._cond:
+            if n >= cap:
+                self._buf[:] = x[-cap:]
+                self._pos = 0
+            else:
+                first = min(n, cap - self._pos)
+                self._buf[self._pos : self._pos + first] = x[:first]
+                self._buf[: n - first] = x[first:]
+                self._pos = (self._pos + n) % cap
+            self.total += n
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def release(self, total: int) -> None:
+        """Reader side: samples before ``total`` may be overwritten."""
+        with self._cond:
+            self.released = max(self.released, int(total))
+            self._cond.notify_all()
+
+    def wait_for_room(self, n: int, timeout: Optional[float] = None) -> bool:
+        """Block until ``n`` more samples fit without overwriting unreleased ones."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.total + n - self.released <= self.capacity or self.closed, timeout)
+
+    def wait_until(self, total: int, timeout: Optional[float] = None) -> bool:
+        """Block until ``total`` samples were written or the buffer is closed."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.total >= total or self.closed, timeout)
+
+    def latest(self, n: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Copy the newest ``n`` samples, oldest first, into ``out`` (or a new array)."""
+        with self._cond:
+            n = min(n, self.total, self.capacity)
+            dst = out[:n] if out is not None else np.empty(n, dtype=np.float32)
+            start = (self._pos - n) % self.capacity
+            first = min(n, self.capacity - start)
+            dst[:first] = self._buf[start : start + first]
+            dst[first:] = self._buf[: n - first]
+        return dst
+
+
+@contextmanager
+def capture_channels(
+    targets: List[Tuple[int, RingBuffer]],
+    sr: int,
+    block_sec: float,
+    device: Optional[Union[int, str]] = None,
+    source: Optional[Iterable[np.ndarray]] = None,
+    backpressure: bool = False,
+):
+    """Feed each ``(channel, ring)`` in ``targets`` from one input, until the block exits.
+
+    The input is a sounddevice input stream (``device``; None for the default
+    microphone) opened once with as many channels as needed, or ``source``, an
+    iterable of ``(frames,)`` or ``(frames, channels)`` float32 blocks read on
+    a thread (e.g. ``file_source``). Rings are closed when ``source`` runs out.
+    With ``backpressure`` the ``source`` thread waits until every ring has
+    room (see ``RingBuffer.release``), so nothing is lost when it runs ahead
+    of the reader.
+    """
+    channels = max(ch for ch, _ in targets) + 1
+    if source is None:
+        sd = _sounddevice()
+
+        def _callback(indata, frames, time_info, status) -> None:
+            for ch, ring in targets:
+                ring.write(indata[:, ch])
+
+        with sd.InputStream(
+            samplerate=sr,
+            device=device,
+            channels=channels,
+            dtype="float32",
+            blocksize=int(sr * block_sec),
+            callback=_callback,
+        ):
+            yield
+        return
+
+    stop = threading.Event()
+
+    def _feed() -> None:
+        try:
+            for block in source:
+                if stop.is_set():
+                    break
+                block = block.reshape(block.shape[0], -1)
+                if backpressure:
+                    for _, ring in targets:
+                        while not ring.wait_for_room(block.shape[0], timeout=0.1):
+                            if stop.is_set():
+                                return
+                for ch, ring in targets:
+                    ring.write(block[:, min(ch, block.shape[1] - 1)])
+        finally:
+            for _, ring in targets:
+                ring.close()
+
+    feeder = threading.Thread(target=_feed, name="audio-feed", daemon=True)
+    feeder.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        feeder.join(timeout=1.0)
+
+
+def file_source(path: str | Path, sr: int = 16000, block_sec: float = 0.5, speed: float = 1.0) -> Iterator[np.ndarray]:
+    """Play a recording back as if it were a live input.
+
+    16-bit PCM WAV at ``sr`` is read as-is, keeping all its channels; anything
+    else goes through ffmpeg and comes out mono. Blocks are paced at ``speed``
+    times real time (0 = as fast as possible).
+    """
+    path = Path(path)
+    audio = None
+    try:
+        with wave.open(str(path), "rb") as w:
+            if w.getsampwidth() == 2 and w.getframerate() == sr:
+                pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+                audio = (pcm.astype(np.float32) / 32768.0).reshape(-1, w.getnchannels())
+    except (wave.Error, EOFError):
+        pass
+    if audio is None:
+        audio = ffmpeg_decode_to_array(path, sr=sr).reshape(-1, 1)
+    block = max(1, int(sr * block_sec))
+    for i in range(0, audio.shape[0], block):
+        if speed > 0:
+            time.sleep(block / sr / speed)
+        yield audio[i : i + block]
 
 
 def record_chunks(
@@ -47,80 +280,60 @@ def record_chunks(
     overlap_sec: int,
     max_duration_sec: Optional[int] = None,
     sr: int = 16000,
-) -> Generator[Path, None, None]:
-    """Record microphone audio and write rolling WAV chunks to disk.
+    as_arrays: bool = False,
+    source: Optional[Iterable[np.ndarray]] = None,
+) -> Generator[Union[Path, Tuple[float, np.ndarray]], None, None]:
+    """Record microphone audio and emit a rolling (segment + overlap) window every second.
 
-    Yields chunk file paths as they are finalized.
+    Capture runs in the audio callback straight into a preallocated ring
+    buffer, so a slow consumer never blocks the device. Yields WAV chunk paths
+    written in-process, or with ``as_arrays`` ``(start_sec, window)`` tuples
+    with no file at all; the window array is reused and only valid until the
+    next iteration. ``source`` replaces the microphone with any iterable of
+    float32 blocks (e.g. a file-backed fake for tests and benchmarks).
     """
     outdir.mkdir(parents=True, exist_ok=True)
-    if sd is None:
-        raise RuntimeError("sounddevice is not available")
 
-    ring = np.zeros(((segment_sec + overlap_sec) * sr, 1), dtype=np.float32)
-    write_len = segment_sec * sr
-    overlap_len = overlap_sec * sr
-    started = time.time()
+    window_len = (segment_sec + overlap_sec) * sr
+    ring = RingBuffer(window_len)
+    window = np.empty(window_len, dtype=np.float32)
+    pcm16 = np.empty(window_len, dtype=np.int16)
+    limit = int(max_duration_sec * sr) if max_duration_sec else None
     idx = 0
-    buf = []
-
-    for block in mic_stream(sr=sr, block_sec=0.5):
-        buf.append(block)
-        if max_duration_sec and (time.time() - started) >= max_duration_sec:
-            # Flush remaining as final chunk
-            if buf:
-                chunk = np.concatenate(buf, axis=0)
-                ring = _append_ring(ring, chunk, sr)
-                fpath = outdir / f"chunk_{idx:04d}.wav"
-                _write_wav_numpy(ring[-(write_len + overlap_len) :], fpath, sr)
-                yield fpath
-            break
-
-        # Emit a chunk every second if enough audio collected for segment
-        total = sum(b.shape[0] for b in buf)
-        if total >= sr:
-            chunk = np.concatenate(buf, axis=0)
-            buf.clear()
-            ring = _append_ring(ring, chunk, sr)
-            # When we accumulate at least (segment_sec) new seconds since last emit, write chunk
-            emitted = outdir.glob("chunk_*.wav")
-            count = len(list(emitted))
-            # Heuristic: write every second once ring has enough samples
-            if ring.shape[0] >= (write_len + overlap_len):
+
+    with capture_channels([(0, ring)], sr, 0.5, source=source):
+        next_emit = sr
+        while True:
+            target = next_emit if limit is None else min(next_emit, limit)
+            ring.wait_until(target)
+            total = ring.total
+            final = ring.closed or (limit is not None and total >= limit)
+            if total == 0 and final:
+                break
+            with span("live.window_copy"):
+                chunk = ring.latest(window_len, out=window)
+            if as_arrays:
+                yield (total - chunk.shape[0]) / sr, chunk
+            else:
                 fpath = outdir / f"chunk_{idx:04d}.wav"
-                _write_wav_numpy(ring[-(write_len + overlap_len) :], fpath, sr)
-                idx += 1
+                _write_wav_numpy(chunk, fpath, sr, scratch=pcm16)
                 yield fpath
+            idx += 1
+            if final:
+                break
+            # Skip ahead rather than queueing windows if the consumer fell behind
+            next_emit = max(next_emit + sr, ring.total)
 
 
-def _append_ring(ring: np.ndarray, data: np.ndarray, sr: int) -> np.ndarray:
-    new_len = ring.shape[0] + data.shape[0]
-    if new_len <= ring.shape[0]:
-        return np.concatenate([ring, data], axis=0)
-    # keep last ring length
-    concat = np.concatenate([ring, data], axis=0)
-    return concat[-ring.shape[0] :]
-
-
-def _write_wav_numpy(x: np.ndarray, path: Path, sr: int) -> None:
-    # Write via ffmpeg to avoid extra deps
-    tmp_raw = path.with_suffix(".raw")
-    x.astype(np.float32).tofile(tmp_raw)
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-f",
-        "f32le",
-        "-ar",
-        str(sr),
-        "-ac",
-        "1",
-        "-i",
-        str(tmp_raw),
-        str(path),
-    ]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    try:
-        tmp_raw.unlink()
-    except Exception:
-        pass
-
+def _write_wav_numpy(x: np.ndarray, path: Path, sr: int, scratch: Optional[np.ndarray] = None) -> None:
+    """Write mono float audio as 16-bit PCM WAV in-process (clips ``x`` in place)."""
+    x = x.reshape(-1)
+    pcm = scratch[: x.shape[0]] if scratch is not None else np.empty(x.shape[0], dtype=np.int16)
+    with span("wav.write"):
+        np.clip(x, -1.0, 1.0, out=x)
+        np.multiply(x, 32767.0, out=pcm, casting="unsafe")
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(sr)
+            w.writeframes(memoryview(pcm).cast("B"))
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import glob
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .io_utils import write_json, write_transcript
+from .metrics import run_metrics, write_metrics
+
+
+MEDIA_EXTS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".wma", ".mp4", ".mkv", ".mov", ".webm"}
+
+# One ASR model per worker process, built by the pool initializer
+_WORKER_BACKEND = None
+
+
+def expand_inputs(spec: str) -> List[Path]:
+    """Resolve a directory (searched recursively for media files) or a glob pattern."""
+    p = Path(spec)
+    if p.is_dir():
+        found = [f for f in p.rglob("*") if f.is_file() and f.suffix.lower() in MEDIA_EXTS]
+    else:
+        found = [Path(f) for f in glob.glob(spec, recursive=True) if Path(f).is_file()]
+    return sorted(found)
+
+
+def _job_outdirs(inputs: List[Path], out_root: Path) -> List[Path]:
+    # Name outputs after the file stem; disambiguate repeated stems
+    seen: Dict[str, int] = {}
+    outdirs = []
+    for f in inputs:
+        n = seen.get(f.stem, 0)
+        seen[f.stem] = n + 1
+        outdirs.append(out_root / (f.stem if n == 0 else f"{f.stem}_{n}"))
+    return outdirs
+
+
+def _init_worker() -> None:
+    global _WORKER_BACKEND
+    from .asr_engine import build_backend
+
+    _WORKER_BACKEND = build_backend()
+
+
+def _run_job(src: str, outdir: str, resume: bool = False, daemon: bool = False) -> Dict:
+    from .asr_engine import _load_asr_config, transcribe_file
+    from .transcript_log import journal_path
+
+    t0 = time.perf_counter()
+    try:
+        cfg = _load_asr_config()
+        journal = journal_path(outdir, cfg, resume=resume)
+        with run_metrics() as metrics:
+            if daemon:
+                from meeting_notes.server import submit_job
+
+                payload = {"path": str(Path(src).resolve()), "journal": str(journal) if journal else None, "resume": resume}
+                result = submit_job("transcribe", payload, priority="batch")
+                segments, summary = result["segments"], result.get("metrics")
+                if summary:
+                    metrics.gauges.update(summary.get("gauges", {}))
+            else:
+                segments = transcribe_file(src, backend=_WORKER_BACKEND, cfg=cfg, journal=journal, resume=resume)
+                summary = None
+            asr_sec = time.perf_counter() - t0
+            write_transcript(outdir, segments)
+        if journal is not None:
+            journal.unlink(missing_ok=True)
+        write_metrics(Path(outdir) / "metrics.json", "asr-batch", summary or metrics.summary())
+    except Exception as e:
+        return {
+            "input": src,
+            "status": "failed",
+            "error": f"{type(e).__name__}: {e}",
+            "wall_sec": round(time.perf_counter() - t0, 3),
+            "worker_pid": os.getpid(),
+        }
+    wall = time.perf_counter() - t0
+    audio_sec = metrics.gauges.get("asr.audio_sec") or max((float(s["end"]) for s in segments), default=0.0)
+    return {
+        "input": src,
+        "outdir": outdir,
+        "status": "done",
+        "segments": len(segments),
+        "audio_sec": round(audio_sec, 3),
+        "asr_sec": round(asr_sec, 3),
+        "wall_sec": round(wall, 3),
+        "rtf": round(asr_sec / audio_sec, 4) if audio_sec else None,
+        "worker_pid": os.getpid(),
+    }
+
+
+def run_batch(
+    inputs: List[Path],
+    out_root: Path,
+    workers: int = 2,
+    manifest: Optional[Path] = None,
+    resume: bool = False,
+    daemon: bool = False,
+) -> Dict:
+    """Transcribe ``inputs`` across a pool of ``workers`` processes.
+
+    Each worker loads its own model once and every job gets a private scratch
+    directory, so files run fully in parallel. Writes ``manifest.json`` (or
+    ``manifest``) with per-file outputs and timings and returns it, even when
+    a worker dies or the run is interrupted (unfinished files are marked
+    ``failed`` or ``not_run``). Every job checkpoints its chunks in its output
+    directory with ``resume`` (or ``journal: true``) and picks them up on the
+    next ``resume`` run.
+
+    With ``daemon`` the files go to the running ``serve`` daemon as
+    ``batch``-class jobs instead, from ``workers`` threads: its loaded model
+    is shared and live windows are scheduled ahead of them.
+    """
+    out_root.mkdir(parents=True, exist_ok=True)
+    outdirs = _job_outdirs(inputs, out_root)
+    started = time.time()
+    t0 = time.perf_counter()
+    jobs: List[Dict] = []
+    try:
+        if daemon:
+            executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        else:
+            # spawn: never fork a parent that may already hold CUDA/thread state
+            ctx = mp.get_context("spawn")
+            executor = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=ctx, initializer=_init_worker)
+        with executor as pool:
+            futures = {
+                pool.submit(_run_job, str(src), str(dst), resume, daemon): src for src, dst in zip(inputs, outdirs)
+            }
+            for fut in as_completed(futures):
+                try:
+                    rec = fut.result()
+                except Exception as e:
+                    # _run_job reports its own errors; this is the worker dying (BrokenProcessPool)
+                    rec = {"input": str(futures[fut]), "status": "failed", "error": f"{type(e).__name__}: {e}"}
+                jobs.append(rec)
+                took = f"{rec['wall_sec']:.1f}s" if "wall_sec" in rec else rec.get("error", "")
+                print(f"[batch] {rec['status']}: {rec['input']} ({took})")
+    finally:
+        # Also after Ctrl+C: record what finished so a rerun with --resume knows where it stands
+        finished = {r["input"] for r in jobs}
+        jobs.extend({"input": str(src), "status": "not_run"} for src in inputs if str(src) not in finished)
+        order = {str(src): i for i, src in enumerate(inputs)}
+        jobs.sort(key=lambda r: order[r["input"]])
+        total_audio = sum(r.get("audio_sec", 0.0) for r in jobs)
+        total_wall = time.perf_counter() - t0
+        result = {
+            "started": started,
+            "workers": workers,
+            "daemon": daemon,
+            "files": len(inputs),
+            "failed": sum(1 for r in jobs if r["status"] != "done"),
+            "audio_sec": round(total_audio, 3),
+            "wall_sec": round(total_wall, 3),
+            "throughput_x": round(total_audio / total_wall, 2) if total_wall else None,
+            "jobs": jobs,
+        }
+        write_json(manifest or out_root / "manifest.json", result)
+    return result
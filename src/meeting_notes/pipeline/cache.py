@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+CACHE_ROOT = Path("data/cache")
+
+
+def content_key(*parts: Any) -> str:
+    """Stable sha256 over JSON-serializable parts (dict keys are sorted)."""
+    h = hashlib.sha256()
+    for p in parts:
+        if isinstance(p, (bytes, bytearray, memoryview)):
+            h.update(p)
+        else:
+            h.update(json.dumps(p, sort_keys=True, ensure_ascii=False, default=str).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def file_digest(path: str | Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(block), b""):
+            h.update(data)
+    return h.hexdigest()
+
+
+class ContentCache:
+    """Content-addressed store with a size cap and LRU eviction.
+
+    Entries live at ``<root>/<namespace>/<key[:2]>/<key>.json`` (or ``.bin``
+    for raw bytes). Reads bump the file mtime, which doubles as the LRU clock;
+    writes are atomic renames so several processes can share one cache
+    directory.
+    """
+
+    SUFFIXES = (".json", ".bin")
+
+    def __init__(self, namespace: str, max_mb: float = 1024, root: Path = CACHE_ROOT):
+        self.dir = Path(root) / namespace
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._size: Optional[int] = None
+
+    def _path(self, key: str, suffix: str = ".json") -> Path:
+        return self.dir / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self.get_bytes(key, suffix=".json")
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_bytes(key, json.dumps(value, ensure_ascii=False).encode(), suffix=".json")
+
+    def get_bytes(self, key: str, suffix: str = ".bin") -> Optional[bytes]:
+        p = self._path(key, suffix)
+        try:
+            data = p.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(p)
+        except OSError:
+            pass
+        return data
+
+    def put_bytes(self, key: str, data: bytes, suffix: str = ".bin") -> None:
+        p = self._path(key, suffix)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, p)
+        if self._size is None:
+            self._size = self.stats()["bytes"]
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under the cap; return count removed."""
+        entries = []
+        for f in self._entries():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for _mtime, size, f in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        count = 0
+        size = 0
+        oldest = None
+        for f in self._entries():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            count += 1
+            size += st.st_size
+            oldest = st.st_mtime if oldest is None else min(oldest, st.st_mtime)
+        return {
+            "path": str(self.dir),
+            "entries": count,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "oldest_age_sec": round(time.time() - oldest, 1) if oldest else None,
+        }
+
+    def _entries(self):
+        if not self.dir.exists():
+            return
+        for f in self.dir.rglob("*"):
+            if f.suffix in self.SUFFIXES:
+                yield f
+
+    def clear(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+        self._size = 0
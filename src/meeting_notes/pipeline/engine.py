@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .metrics import bind, current
+
+
+_DONE = object()
+
+
+class _Probe:
+    """Bounded queue that records its depth and how long producers/consumers block."""
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.q: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self.samples = 0
+        self.depth_sum = 0
+        self.depth_max = 0
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+
+    def put(self, item: Any) -> None:
+        t0 = time.perf_counter()
+        self.q.put(item)
+        self.put_wait += time.perf_counter() - t0
+        self._sample()
+
+    def get(self) -> Any:
+        t0 = time.perf_counter()
+        item = self.q.get()
+        self.get_wait += time.perf_counter() - t0
+        self._sample()
+        return item
+
+    def _sample(self) -> None:
+        depth = self.q.qsize()
+        self.samples += 1
+        self.depth_sum += depth
+        self.depth_max = max(self.depth_max, depth)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "capacity": self.maxsize,
+            "mean_depth": round(self.depth_sum / self.samples, 2) if self.samples else 0.0,
+            "max_depth": self.depth_max,
+            "put_wait_sec": round(self.put_wait, 3),
+            "get_wait_sec": round(self.get_wait, 3),
+        }
+
+
+def run_pipelined(
+    source: Iterable[Any],
+    infer: Callable[[Any], Any],
+    sink: Callable[[Any], None],
+    queue_size: int = 4,
+) -> Dict[str, Dict]:
+    """Run decode -> infer -> stitch as three overlapping stages.
+
+    ``source`` is iterated on a producer thread, ``infer`` runs on the calling
+    thread (so the model stays on the thread that loaded it) and ``sink`` runs
+    on a consumer thread. Items keep their order. Returns per-stage busy time
+    and per-queue depth stats; a queue that sits full points at its consumer
+    as the bottleneck, one that sits empty at its producer.
+    """
+    q_in = _Probe("decode->infer", max(1, queue_size))
+    q_out = _Probe("infer->stitch", max(1, queue_size))
+    busy = {"decode": 0.0, "infer": 0.0, "stitch": 0.0}
+    counts = {"decode": 0, "infer": 0, "stitch": 0}
+    errors: list = []
+    stop = threading.Event()
+    metrics = current()
+
+    def _produce() -> None:
+        # Helper threads record into the caller's run
+        with bind(metrics):
+            try:
+                it = iter(source)
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    try:
+                        item = next(it)
+                    except StopIteration:
+                        break
+                    busy["decode"] += time.perf_counter() - t0
+                    counts["decode"] += 1
+                    q_in.put(item)
+            except BaseException as e:  # surfaced on the calling thread
+                errors.append(e)
+            finally:
+                q_in.put(_DONE)
+
+    def _consume() -> None:
+        with bind(metrics):
+            while True:
+                item = q_out.get()
+                if item is _DONE:
+                    return
+                if errors:
+                    continue  # drain so the infer stage never blocks on put
+                t0 = time.perf_counter()
+                try:
+                    sink(item)
+                except BaseException as e:
+                    errors.append(e)
+                    stop.set()
+                busy["stitch"] += time.perf_counter() - t0
+                counts["stitch"] += 1
+
+    producer = threading.Thread(target=_produce, name="asr-decode", daemon=True)
+    consumer = threading.Thread(target=_consume, name="asr-stitch", daemon=True)
+    producer.start()
+    consumer.start()
+    try:
+        while True:
+            item = q_in.get()
+            if item is _DONE:
+                break
+            if errors:
+                continue
+            t0 = time.perf_counter()
+            out = infer(item)
+            busy["infer"] += time.perf_counter() - t0
+            counts["infer"] += 1
+            q_out.put(out)
+    except BaseException:
+        stop.set()
+        # Unblock the producer if it is waiting on a full queue
+        while producer.is_alive():
+            try:
+                q_in.q.get_nowait()
+            except queue.Empty:
+                time.sleep(0.01)
+        raise
+    finally:
+        q_out.put(_DONE)
+        consumer.join()
+        producer.join()
+
+    if errors:
+        raise errors[0]
+    return {
+        "stages": {
+            k: {"busy_sec": round(busy[k], 3), "items": counts[k]} for k in busy
+        },
+        "queues": {q.name: q.stats() for q in (q_in, q_out)},
+    }
+
+
+def format_stats(stats: Dict[str, Dict], prefix: Optional[str] = "[asr]") -> str:
+    stages = " | ".join(f"{k} {v['busy_sec']:.2f}s" for k, v in stats["stages"].items())
+    queues = " | ".join(
+        f"{k} depth {v['mean_depth']:.1f}/{v['capacity']} (max {v['max_depth']})"
+        for k, v in stats["queues"].items()
+    )
+    return f"{prefix} pipeline busy: {stages} || {queues}"
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import yaml
 
+from .metrics import span
+
 
 def load_yaml(path: str | Path) -> Dict[str, Any]:
     return yaml.safe_load(Path(path).read_text())
@@ -29,3 +31,37 @@ def write_json(path: str | Path, data: Any) -> None:
 def read_json(path: str | Path) -> Any:
     return json.loads(Path(path).read_text())
 
+
+def write_transcript(outdir: str | Path, segments: List[Dict]) -> Path:
+    """Write ``transcript.json``, ``transcript.txt`` and the binary ``transcript.seg`` into ``outdir``."""
+    from .segments import SegmentStore
+
+    out = ensure_dir(outdir)
+    with span("io.write_transcript"):
+        (out / "transcript.json").write_text(
+            json.dumps({"segments": segments}, indent=2, ensure_ascii=False)
+        )
+        (out / "transcript.txt").write_text("\n".join(
+            f"[{mmss(s['start'])}-{mmss(s['end'])}] {s['text']}" for s in segments
+        ))
+        SegmentStore.from_segments(segments).save(out / "transcript.seg")
+    return out
+
+
+def load_transcript(path: str | Path, start: Optional[float] = None, end: Optional[float] = None):
+    """Load segments from ``transcript.json`` (a list of dicts) or ``.seg`` (a memory-mapped ``SegmentStore``).
+
+    ``start``/``end`` (seconds) keep only segments overlapping that range.
+    """
+    path = Path(path)
+    lo = float("-inf") if start is None else start
+    hi = float("inf") if end is None else end
+    if path.suffix == ".seg":
+        from .segments import SegmentStore
+
+        store = SegmentStore.load(path)
+        return store if start is None and end is None else store.slice_time(lo, hi)
+    segments = json.loads(path.read_text())["segments"]
+    if start is None and end is None:
+        return segments
+    return [s for s in segments if float(s["end"]) > lo and float(s["start"]) < hi]
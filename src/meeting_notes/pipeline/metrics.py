@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+# Directory for Prometheus textfile-collector output (one .prom file per command)
+PROM_DIR_ENV = "MEETING_NOTES_PROM_TEXTFILE_DIR"
+
+
+class Metrics:
+    """Span timings, counters and gauges for one run.
+
+    Spans are named ``<area>.<stage>`` (``asr.infer``, ``ffmpeg.decode``,
+    ``llm.prompt_eval``...). Recording is a lock and a list append, cheap
+    enough to leave on everywhere.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.spans: Dict[str, List[float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.info: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans.setdefault(name, []).append(seconds)
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def total(self, name: str) -> float:
+        with self._lock:
+            return float(sum(self.spans.get(name, ())))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = {k: list(v) for k, v in self.spans.items()}
+            out = {
+                "started": self.started,
+                "wall_sec": round(time.time() - self.started, 3),
+                "spans": {k: _span_stats(v) for k, v in sorted(spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "gauges": dict(sorted(self.gauges.items())),
+            }
+            if self.info:
+                out["info"] = dict(self.info)
+        return out
+
+
+_default = Metrics()
+# Runs are bound per thread so concurrent jobs (``serve``) keep separate metrics
+_local = threading.local()
+
+
+def current() -> Metrics:
+    return getattr(_local, "metrics", None) or _default
+
+
+def span(name: str):
+    """Time a block into the current run's metrics."""
+    return current().span(name)
+
+
+@contextmanager
+def run_metrics() -> Iterator[Metrics]:
+    """Collect metrics for one command or job into a fresh ``Metrics``.
+
+    The run is bound to the calling thread; helper threads join it with ``bind``.
+    """
+    with bind(Metrics()) as metrics:
+        yield metrics
+
+
+@contextmanager
+def bind(metrics: Metrics) -> Iterator[Metrics]:
+    """Record into ``metrics`` on this thread for the duration of the block."""
+    previous = getattr(_local, "metrics", None)
+    _local.metrics = metrics
+    try:
+        yield metrics
+    finally:
+        _local.metrics = previous
+
+
+def write_metrics(path: str | Path, run: str, summary: Dict[str, Any]) -> Path:
+    """Store ``summary`` under ``runs.<run>`` in ``path`` (other runs are kept).
+
+    Also writes ``<PROM_DIR_ENV>/meeting_notes_<run>.prom`` when that variable is set.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        data = {}
+    data.setdefault("runs", {})[run] = summary
+    path.write_text(json.dumps(data, indent=2))
+    prom_dir = os.environ.get(PROM_DIR_ENV)
+    if prom_dir:
+        write_prometheus(Path(prom_dir) / f"meeting_notes_{_label(run)}.prom", run, summary)
+    return path
+
+
+def write_prometheus(path: Path, run: str, summary: Dict[str, Any]) -> None:
+    """Write ``summary`` in the Prometheus text format, atomically (textfile collector safe)."""
+    run = _label(run)
+    lines = [
+        "# HELP meeting_notes_span_seconds Time spent per pipeline stage.",
+        "# TYPE meeting_notes_span_seconds summary",
+    ]
+    for name, st in summary.get("spans", {}).items():
+        labels = f'run="{run}",span="{name}"'
+        for q, key in (("0.5", "p50_ms"), ("0.9", "p90_ms"), ("0.99", "p99_ms")):
+            lines.append(f'meeting_notes_span_seconds{{{labels},quantile="{q}"}} {st[key] / 1000:.6f}')
+        lines.append(f"meeting_notes_span_seconds_sum{{{labels}}} {st['total_sec']:.6f}")
+        lines.append(f"meeting_notes_span_seconds_count{{{labels}}} {st['count']}")
+    lines += ["# HELP meeting_notes_counter Counters per run.", "# TYPE meeting_notes_counter gauge"]
+    for name, v in summary.get("counters", {}).items():
+        lines.append(f'meeting_notes_counter{{run="{run}",name="{name}"}} {v}')
+    lines += ["# HELP meeting_notes_gauge Derived values per run (rtf, tokens/s...).", "# TYPE meeting_notes_gauge gauge"]
+    for name, v in summary.get("gauges", {}).items():
+        lines.append(f'meeting_notes_gauge{{run="{run}",name="{name}"}} {v}')
+    lines.append(f'meeting_notes_last_run_timestamp_seconds{{run="{run}"}} {summary.get("started", time.time()):.0f}')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".prom.tmp")
+    tmp.write_text("\n".join(lines) + "\n")
+    tmp.replace(path)
+
+
+def _span_stats(values: List[float]) -> Dict[str, float]:
+    # Plain Python so importing metrics (every pipeline module does) stays free of NumPy
+    ms = sorted(v * 1000 for v in values)
+    return {
+        "count": len(ms),
+        "total_sec": round(sum(ms) / 1000, 6),
+        "p50_ms": round(_percentile(ms, 50), 3),
+        "p90_ms": round(_percentile(ms, 90), 3),
+        "p99_ms": round(_percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    # Linear interpolation between closest ranks, as numpy.percentile does by default
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _label(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_]", "_", s)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .asr_engine import SAMPLE_RATE, _load_asr_config, _shift_segments, build_backend
+from .audio_utils import RingBuffer, capture_channels, file_source
+from .metrics import current
+from .stitcher import Stitcher
+from .transcript_log import TranscriptLog
+from .vad import make_vad
+
+
+class InputSpec:
+    """One live input: a channel of an audio device, or a recording played back as live."""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        device: Optional[Union[int, str]] = None,
+        path: Optional[Path] = None,
+        channel: int = 0,
+    ):
+        self.name = name
+        self.kind = kind
+        self.device = device
+        self.path = path
+        self.channel = channel
+
+    @property
+    def source_key(self) -> Tuple:
+        # Inputs sharing a device (or file) are captured through one stream
+        return (self.kind, self.device if self.kind == "mic" else str(self.path))
+
+
+def parse_inputs(specs: List[str]) -> List[InputSpec]:
+    """Parse ``[name=]mic[:device][#channel]`` and ``[name=]file:path[#channel]`` specs.
+
+    Devices are sounddevice indices or names; channels count from 1. Names
+    default to ``stream1``, ``stream2``... and must be unique, since each
+    stream gets its own output directory.
+    """
+    out: List[InputSpec] = []
+    for i, spec in enumerate(specs):
+        name, src = f"stream{i + 1}", spec
+        head = spec.split(":", 1)[0]
+        if "=" in head:
+            name, src = spec.split("=", 1)
+        src, _, ch = src.partition("#")
+        channel = int(ch) - 1 if ch else 0
+        if channel < 0:
+            raise ValueError(f"Channels count from 1: {spec!r}")
+        kind, _, arg = src.partition(":")
+        if kind == "mic":
+            device: Optional[Union[int, str]] = (int(arg) if arg.isdigit() else arg) if arg else None
+            out.append(InputSpec(name, "mic", device=device, channel=channel))
+        elif kind == "file" and arg:
+            out.append(InputSpec(name, "file", path=Path(arg), channel=channel))
+        else:
+            raise ValueError(f"Unknown live input {spec!r}; use mic[:device][#channel] or file:path")
+    names = [s.name for s in out]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Live input names must be unique: {', '.join(names)}")
+    return out
+
+
+class _Stream:
+    """Per-input state: ring buffer, VAD, stitcher and transcript log."""
+
+    def __init__(self, spec: InputSpec, outdir: Path, cfg: Dict, ring_sec: float):
+        self.spec = spec
+        self.name = spec.name
+        self.ring = RingBuffer(int(ring_sec * SAMPLE_RATE))
+        self.vad = make_vad(cfg, sr=SAMPLE_RATE)
+        self.stitcher = Stitcher()
+        self.log = TranscriptLog(outdir / spec.name, fsync_sec=float(cfg.get("live", {}).get("fsync_sec", 5.0)))
+        self.emitted = 0  # samples already handed to the model
+
+    def poll(self, step: int, overlap: int, final: bool) -> Optional[Tuple[float, np.ndarray]]:
+        """Return ``(start_sec, window)`` once ``step`` new samples (or the tail) are in."""
+        total = self.ring.total
+        new = total - self.emitted
+        if new <= 0 or (new < step and not final):
+            return None
+        n = min(new + overlap, total, self.ring.capacity)
+        if new > self.ring.capacity:
+            # Inference fell behind by more than the ring holds; that audio is gone
+            current().inc("live.dropped_sec", (new - self.ring.capacity) / SAMPLE_RATE)
+        window = self.ring.latest(n)
+        # A second of lead-in so words cut at the previous window edge still count
+        fresh = window[-min(n, new + SAMPLE_RATE) :]
+        self.emitted = total
+        # The next window starts ``overlap`` before this one ends
+        self.ring.release(total - overlap)
+        if self.vad is not None and not self.vad.has_speech(fresh):
+            current().inc("live.silent_skipped")
+            return None
+        return (total - n) / SAMPLE_RATE, window
+
+
+def transcribe_live_multi(
+    inputs: List[str],
+    outdir: Path,
+    duration_sec: Optional[int] = None,
+    on_commit: Optional[Callable[[str, List[Dict]], None]] = None,
+    speed: float = 1.0,
+    backend: Optional[object] = None,
+    cfg: Optional[Dict] = None,
+) -> Dict[str, List[Dict]]:
+    """Transcribe several live inputs with one shared model.
+
+    Every stream is cut into windows of ``live.multi.step_sec`` new audio plus
+    ``chunking.overlap_sec`` of context. Ready windows from all streams are
+    queued and run through the model together, up to ``batch_size`` at a
+    time; a partial batch runs as soon as its oldest window has waited
+    ``live.multi.max_wait_ms``. Each stream is stitched on its own and written
+    to ``outdir/<name>/`` like a single ``asr-live`` session. ``file:`` inputs
+    are played back at ``speed`` times real time (0 = as fast as possible);
+    their playback waits for the model instead of dropping audio.
+    """
+    cfg = cfg if cfg is not None else _load_asr_config()
+    specs = parse_inputs(inputs)
+    mc = cfg.get("live", {}).get("multi", {})
+    step = int(float(mc.get("step_sec", 5.0)) * SAMPLE_RATE)
+    overlap = int(cfg.get("chunking", {}).get("overlap_sec", 1)) * SAMPLE_RATE
+    max_batch = max(1, int(cfg.get("batch_size", 8)))
+    max_wait = float(mc.get("max_wait_ms", 300)) / 1000
+    poll_sec = float(mc.get("poll_ms", 20)) / 1000
+    # Room for a few windows in case inference falls behind
+    ring_sec = 4 * (step + overlap) / SAMPLE_RATE
+
+    model_any = backend if backend is not None else build_backend(cfg)
+    streams = {s.name: _Stream(s, outdir, cfg, ring_sec) for s in specs}
+    metrics = current()
+    pending: List[Tuple[_Stream, float, np.ndarray, float]] = []
+
+    def _run_batch(batch: List[Tuple[_Stream, float, np.ndarray, float]]) -> None:
+        with metrics.span("asr.infer"):
+            results = model_any.transcribe_batch(
+                [w for _, _, w, _ in batch],
+                language=cfg.get("language"),
+                vad=cfg.get("vad"),
+                batch_size=len(batch),
+                durations=[w.shape[0] / SAMPLE_RATE for _, _, w, _ in batch],
+            )
+        metrics.inc("live.batches")
+        metrics.inc("live.windows", len(batch))
+        for (stream, start, _, ready), new in zip(batch, results):
+            _shift_segments(new, start)
+            kept = stream.stitcher.extend(new)
+            if not kept:
+                continue
+            stream.log.append(kept)
+            if on_commit is not None:
+                on_commit(stream.name, kept)
+            metrics.observe("live.latency", time.time() - ready)
+            print(f"[live] {stream.name}: segments {len(stream.stitcher)} | batch {len(batch)} | {kept[-1]['text'][-50:]}")
+
+    groups: Dict[Tuple, List[InputSpec]] = defaultdict(list)
+    for s in specs:
+        groups[s.source_key].append(s)
+    started = time.time()
+    try:
+        with ExitStack() as stack:
+            for group in groups.values():
+                targets = [(s.channel, streams[s.name].ring) for s in group]
+                first = group[0]
+                source = file_source(first.path, sr=SAMPLE_RATE, speed=speed) if first.kind == "file" else None
+                stack.enter_context(
+                    capture_channels(
+                        targets, SAMPLE_RATE, 0.5, device=first.device, source=source, backpressure=source is not None
+                    )
+                )
+            print(f"[live] {len(streams)} streams: {', '.join(streams)}")
+            while True:
+                stop = bool(duration_sec) and time.time() - started >= duration_sec
+                closed = all(st.ring.closed for st in streams.values())
+                for st in streams.values():
+                    win = st.poll(step, overlap, final=stop or st.ring.closed)
+                    if win is not None:
+                        pending.append((st, win[0], win[1], time.time()))
+                if pending and (
+                    len(pending) >= max_batch or time.time() - pending[0][3] >= max_wait or stop or closed
+                ):
+                    batch, pending = pending[:max_batch], pending[max_batch:]
+                    _run_batch(batch)
+                    continue
+                if stop or closed:
+                    break
+                time.sleep(poll_sec)
+    except KeyboardInterrupt:
+        print("[live] Stopped by user")
+    finally:
+        results = {name: st.log.compact() for name, st in streams.items()}
+    return results
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import copy
+import os
+import platform
+import re
+import shutil
+import subprocess
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+from .io_utils import load_yaml
+
+
+# Written by `meeting-notes tune`, one file per device/backend/model
+PROFILE_DIR = Path("configs/profiles")
+# Only these keys are taken from a profile
+TUNED_KEYS = ("batch_size", "chunking.segment_sec", "chunking.overlap_sec")
+
+_announced: set = set()
+
+
+def device_tag(device: str = "auto") -> str:
+    """Short name for the hardware ``device`` runs on, e.g. ``nvidia-a10g`` or ``cpu-x86_64-8c``."""
+    return _device_tag(str(device or "auto"))
+
+
+@lru_cache(maxsize=None)
+def _device_tag(device: str) -> str:
+    if not device.startswith("cpu"):
+        index = int(device.split(":", 1)[1]) if device.startswith("cuda:") else 0
+        gpu = _gpu_name(index)
+        if gpu:
+            return _slug(gpu)
+    return _slug(f"cpu-{platform.machine() or 'unknown'}-{os.cpu_count() or 1}c")
+
+
+def profile_path(cfg: Dict) -> Path:
+    backend = _slug(str(cfg.get("backend", "nemo")))
+    model = _slug(str(cfg.get("model", "")))
+    return PROFILE_DIR / f"{device_tag(cfg.get('device', 'auto'))}--{backend}--{model}.yaml"
+
+
+def backend_defaults(cfg: Dict) -> Dict:
+    """Overlay the ``profiles.<backend>`` entry of ``configs/asr.yaml`` on the global settings."""
+    entry = _profiles_cfg(cfg).get(str(cfg.get("backend", "nemo")))
+    if not isinstance(entry, dict):
+        return cfg
+    out = copy.deepcopy(cfg)
+    _merge(out, entry)
+    return out
+
+
+def apply_profile(cfg: Dict) -> Dict:
+    """Overlay the tuned settings for this device, backend and model, if ``tune`` wrote any.
+
+    Set ``profiles.tuned: false`` in ``configs/asr.yaml`` to ignore them.
+    """
+    # Checked first so a machine without profiles never probes for a GPU
+    if not _profiles_cfg(cfg).get("tuned", True) or not PROFILE_DIR.is_dir() or not any(PROFILE_DIR.glob("*.yaml")):
+        return cfg
+    path = profile_path(cfg)
+    if not path.exists():
+        return cfg
+    settings = (load_yaml(path) or {}).get("settings", {})
+    out = copy.deepcopy(cfg)
+    for key in TUNED_KEYS:
+        value = _get(settings, key)
+        if value is not None:
+            _set(out, key, value)
+    if path not in _announced:
+        _announced.add(path)
+        print(f"[asr] using tuned profile {path}")
+    return out
+
+
+def write_profile(cfg: Dict, settings: Dict, calibration: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    path = Path(path) if path is not None else profile_path(cfg)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = {
+        "device": device_tag(cfg.get("device", "auto")),
+        "backend": cfg.get("backend"),
+        "model": cfg.get("model"),
+        "settings": settings,
+        "calibration": calibration,
+    }
+    header = (
+        f"# Written by `meeting-notes tune` on {time.strftime('%Y-%m-%d %H:%M')}.\n"
+        "# `settings` override configs/asr.yaml on this device; delete the file to undo.\n"
+    )
+    tmp = path.with_suffix(".yaml.tmp")
+    tmp.write_text(header + yaml.safe_dump(doc, sort_keys=False))
+    tmp.replace(path)
+    return path
+
+
+def _profiles_cfg(cfg: Dict) -> Dict:
+    # `profiles: true/false` is the older spelling of `profiles.tuned`
+    pc = cfg.get("profiles", True)
+    return pc if isinstance(pc, dict) else {"tuned": bool(pc)}
+
+
+def _merge(d: Dict, update: Dict) -> None:
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(d.get(key), dict):
+            _merge(d[key], value)
+        else:
+            d[key] = copy.deepcopy(value)
+
+
+def _gpu_name(index: int) -> Optional[str]:
+    # nvidia-smi answers in ~50 ms without loading CUDA into this process
+    exe = shutil.which("nvidia-smi")
+    if exe is None:
+        return None
+    try:
+        out = subprocess.run(
+            [exe, "--query-gpu=name", "--format=csv,noheader"], capture_output=True, text=True, timeout=5
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    names = [line.strip() for line in out.splitlines() if line.strip()]
+    return names[index] if index < len(names) else None
+
+
+def _slug(s: str) -> str:
+    return re.sub(r"[^a-z0-9_.]+", "-", s.lower()).strip("-") or "default"
+
+
+def _get(d: Dict, dotted: str) -> Any:
+    for part in dotted.split("."):
+        if not isinstance(d, dict):
+            return None
+        d = d.get(part)
+    return d
+
+
+def _set(d: Dict, dotted: str, value: Any) -> None:
+    *parents, last = dotted.split(".")
+    for part in parents:
+        d = d.setdefault(part, {})
+    d[last] = value
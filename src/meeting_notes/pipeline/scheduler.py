@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from .metrics import _span_stats, current
+
+
+# Highest first: a waiting live window goes before interactive work, which goes before batch
+PRIORITIES = ("live", "interactive", "batch")
+
+
+class Scheduler:
+    """Priority arbitration for a shared model.
+
+    Every model call takes a ``slot`` in a priority class. At most ``slots``
+    calls run at once and at most ``limits[cls]`` of them per class; when a
+    slot frees up it goes to the oldest waiter of the highest class that may
+    run. Long jobs take a slot per chunk batch, so they yield to live windows
+    between batches instead of holding the model for a whole file.
+
+    Waits are measured from ``since`` (e.g. job submission) when given and
+    count as deadline misses beyond ``deadlines_ms[cls]``.
+    """
+
+    def __init__(
+        self,
+        slots: int = 1,
+        limits: Optional[Dict[str, int]] = None,
+        max_queue: Optional[Dict[str, int]] = None,
+        deadlines_ms: Optional[Dict[str, float]] = None,
+        keep: int = 1000,
+    ):
+        self.slots = max(1, int(slots))
+        limits = limits or {}
+        max_queue = max_queue or {}
+        deadlines_ms = deadlines_ms or {}
+        self.limits = {c: max(1, int(limits.get(c, self.slots))) for c in PRIORITIES}
+        self.max_queue = {c: max(1, int(max_queue.get(c, 64))) for c in PRIORITIES}
+        self.deadlines = {c: float(deadlines_ms[c]) / 1000 for c in PRIORITIES if deadlines_ms.get(c)}
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._waiting: Dict[str, Deque[int]] = {c: deque() for c in PRIORITIES}
+        self._running = {c: 0 for c in PRIORITIES}
+        self._waits: Dict[str, Deque[float]] = {c: deque(maxlen=keep) for c in PRIORITIES}
+        self._served = {c: 0 for c in PRIORITIES}
+        self._misses = {c: 0 for c in PRIORITIES}
+        self._rejected = {c: 0 for c in PRIORITIES}
+
+    @contextmanager
+    def slot(self, cls: str, since: Optional[float] = None) -> Iterator[float]:
+        """Hold the model for one call in class ``cls``; yields the seconds waited."""
+        if cls not in PRIORITIES:
+            raise ValueError(f"Unknown priority class {cls!r}; use one of {', '.join(PRIORITIES)}")
+        since = time.time() if since is None else since
+        with self._cond:
+            ticket = next(self._tickets)
+            self._waiting[cls].append(ticket)
+            try:
+                while not self._may_run(cls, ticket):
+                    self._cond.wait()
+            finally:
+                self._waiting[cls].remove(ticket)
+                # A lower class may be next now that this waiter is gone
+                self._cond.notify_all()
+            self._running[cls] += 1
+        waited = max(0.0, time.time() - since)
+        self.record(cls, waited)
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._running[cls] -= 1
+                self._cond.notify_all()
+
+    def admit(self, cls: str, queued: int) -> bool:
+        """Admission control for callers with their own queue: False once ``queued`` hits ``max_queue``."""
+        if queued < self.max_queue[cls]:
+            return True
+        with self._cond:
+            self._rejected[cls] += 1
+        current().inc(f"sched.rejected.{cls}")
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out: Dict[str, Any] = {"slots": self.slots, "busy": sum(self._running.values())}
+            for c in PRIORITIES:
+                waits = list(self._waits[c])
+                out[c] = {
+                    "limit": self.limits[c],
+                    "running": self._running[c],
+                    "waiting": len(self._waiting[c]),
+                    "served": self._served[c],
+                    "rejected": self._rejected[c],
+                    "deadline_misses": self._misses[c],
+                    "wait": _span_stats(waits) if waits else None,
+                }
+        return out
+
+    def _may_run(self, cls: str, ticket: int) -> bool:
+        if self._waiting[cls][0] != ticket:
+            return False  # FIFO within a class
+        if sum(self._running.values()) >= self.slots or self._running[cls] >= self.limits[cls]:
+            return False
+        for hi in PRIORITIES[: PRIORITIES.index(cls)]:
+            if self._waiting[hi] and self._running[hi] < self.limits[hi]:
+                return False
+        return True
+
+    def record(self, cls: str, waited: float) -> None:
+        """Count a wait in ``cls``, e.g. queue time of work that takes no slot."""
+        missed = cls in self.deadlines and waited > self.deadlines[cls]
+        with self._cond:
+            self._waits[cls].append(waited)
+            self._served[cls] += 1
+            self._misses[cls] += int(missed)
+        metrics = current()
+        metrics.observe(f"sched.wait.{cls}", waited)
+        if missed:
+            metrics.inc(f"sched.deadline_miss.{cls}")
+
+
+class ScheduledBackend:
+    """ASR backend wrapper that takes a scheduler slot for every model call.
+
+    ``since`` (a ``time.time()`` stamp, e.g. when the job was queued) is
+    charged to the first call only.
+    """
+
+    def __init__(self, backend: Any, scheduler: Scheduler, cls: str, since: Optional[float] = None):
+        self._backend = backend
+        self._scheduler = scheduler
+        self._cls = cls
+        self._since = since
+
+    def transcribe_batch(self, audios: List[Any], **kwargs: Any) -> List[List[Dict]]:
+        with self._slot():
+            return self._backend.transcribe_batch(audios, **kwargs)
+
+    def transcribe(self, audio: Any, **kwargs: Any) -> List[Dict]:
+        with self._slot():
+            return self._backend.transcribe(audio, **kwargs)
+
+    def transcribe_words(self, audio: Any, **kwargs: Any):
+        with self._slot():
+            return self._backend.transcribe_words(audio, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._backend, name)
+
+    def _slot(self):
+        since, self._since = self._since, None
+        return self._scheduler.slot(self._cls, since=since)
+
+
+def scheduler_from_config(cfg: Dict) -> Scheduler:
+    sc = cfg.get("scheduler", {})
+    return Scheduler(
+        slots=int(sc.get("slots", 1)),
+        limits=sc.get("limits"),
+        max_queue=sc.get("max_queue"),
+        deadlines_ms=sc.get("deadline_ms"),
+    )
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+MAGIC = b"MNSEG001"
+SUFFIX = ".seg"
+_ALIGN = 8
+
+
+class SegmentStore:
+    """Read-only columnar container for transcript segments.
+
+    Start and end times are float64 columns and all text sits in one packed
+    UTF-8 buffer addressed by an offsets column, so a transcript costs a few
+    arrays instead of one dict per segment. Word timestamps (``words`` in the
+    dict form) are stored the same way. Segments must be sorted by start.
+
+    ``save``/``load`` use a flat binary file whose columns are memory-mapped on
+    load: opening a long archive reads only the header, and ``slice_time``
+    normally returns a view without touching the text of other segments.
+    Iterating yields the usual ``{"start", "end", "text"[, "words"]}`` dicts,
+    so a store can be passed wherever a segment list is expected.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], lo: int = 0, hi: Optional[int] = None):
+        self._c = columns
+        self._lo = lo
+        self._hi = len(columns["start"]) if hi is None else hi
+        self._reach: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict]) -> "SegmentStore":
+        segments = list(segments)
+        texts = [s.get("text", "").encode("utf-8") for s in segments]
+        has_words = any(s.get("words") for s in segments)
+        columns = {
+            "start": np.array([float(s.get("start", 0.0)) for s in segments], dtype=np.float64),
+            "end": np.array([float(s.get("end", s.get("start", 0.0))) for s in segments], dtype=np.float64),
+            "text_off": _offsets(len(t) for t in texts),
+            "text": np.frombuffer(b"".join(texts), dtype=np.uint8),
+        }
+        if has_words:
+            words = [s.get("words") or [] for s in segments]
+            flat = [w for ws in words for w in ws]
+            wtexts = [str(w[2]).encode("utf-8") for w in flat]
+            columns.update(
+                word_idx=_offsets(len(ws) for ws in words),
+                word_start=np.array([float(w[0]) for w in flat], dtype=np.float64),
+                word_end=np.array([float(w[1]) for w in flat], dtype=np.float64),
+                word_off=_offsets(len(t) for t in wtexts),
+                word_text=np.frombuffer(b"".join(wtexts), dtype=np.uint8),
+            )
+        if columns["start"].size > 1 and np.any(np.diff(columns["start"]) < 0):
+            raise ValueError("Segments must be sorted by start time")
+        return cls(columns)
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> "SegmentStore":
+        """Open a ``.seg`` file; with ``mmap`` the columns are read lazily from disk."""
+        path = Path(path)
+        if mmap:
+            raw = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            raw = np.fromfile(path, dtype=np.uint8)
+        if bytes(raw[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a segment store (bad magic)")
+        hlen = int(raw[len(MAGIC) : len(MAGIC) + 8].view("<u8")[0])
+        header = json.loads(bytes(raw[len(MAGIC) + 8 : len(MAGIC) + 8 + hlen]))
+        columns = {}
+        for name, (dtype, offset, count) in header["columns"].items():
+            itemsize = np.dtype(dtype).itemsize
+            columns[name] = raw[offset : offset + count * itemsize].view(dtype)
+        return cls(columns)
+
+    def save(self, path: str | Path) -> Path:
+        """Write this store (or view) as a ``.seg`` file, atomically."""
+        path = Path(path)
+        columns = self._materialize()
+        rel: Dict[str, List] = {}
+        pos = 0
+        for name, arr in columns.items():
+            rel[name] = [arr.dtype.str, pos, int(arr.shape[0])]
+            pos = _aligned(pos + arr.nbytes)
+        # Column offsets depend on the header length and vice versa; settle both
+        base = 0
+        while True:
+            header = {name: [dt, off + base, n] for name, (dt, off, n) in rel.items()}
+            head = json.dumps({"version": 1, "count": len(self), "columns": header}).encode()
+            need = _aligned(len(MAGIC) + 8 + len(head))
+            if need <= base:
+                break
+            base = need
+        head = head.ljust(base - len(MAGIC) - 8)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.array([len(head)], dtype="<u8").tobytes())
+            f.write(head)
+            for name, arr in columns.items():
+                f.seek(header[name][1])
+                f.write(np.ascontiguousarray(arr).tobytes())
+        os.replace(tmp, path)
+        return path
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self._c["start"][self._lo : self._hi]
+
+    @property
+    def ends(self) -> np.ndarray:
+        return self._c["end"][self._lo : self._hi]
+
+    @property
+    def has_words(self) -> bool:
+        return "word_idx" in self._c
+
+    def text(self, i: int) -> str:
+        j = self._index(i)
+        off = self._c["text_off"]
+        return bytes(self._c["text"][off[j] : off[j + 1]]).decode("utf-8")
+
+    def words(self, i: int) -> List[List]:
+        if not self.has_words:
+            return []
+        j = self._index(i)
+        c = self._c
+        out = []
+        for k in range(int(c["word_idx"][j]), int(c["word_idx"][j + 1])):
+            w = bytes(c["word_text"][c["word_off"][k] : c["word_off"][k + 1]]).decode("utf-8")
+            out.append([float(c["word_start"][k]), float(c["word_end"][k]), w])
+        return out
+
+    def rows(self) -> Iterator[Tuple[float, float, str]]:
+        """(start, end, text) for each segment, without building dicts."""
+        starts, ends = self.starts, self.ends
+        off, buf = self._c["text_off"], self._c["text"]
+        for k, j in enumerate(range(self._lo, self._hi)):
+            yield float(starts[k]), float(ends[k]), bytes(buf[off[j] : off[j + 1]]).decode("utf-8")
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("SegmentStore slices must be contiguous")
+            return SegmentStore(self._c, self._lo + lo, self._lo + max(lo, hi))
+        j = self._index(i)
+        seg = {"start": float(self._c["start"][j]), "end": float(self._c["end"][j]), "text": self.text(i)}
+        words = self.words(i)
+        if words:
+            seg["words"] = words
+        return seg
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_segments(self) -> List[Dict]:
+        return list(self)
+
+    def slice_time(self, start: float, end: float) -> "SegmentStore":
+        """The segments overlapping ``[start, end)`` seconds.
+
+        Usually a view. When a long segment overlaps ``start``, shorter ones
+        after it may end before ``start``; those are left out, which takes a
+        copy of the matching segments.
+        """
+        hi = int(np.searchsorted(self.starts, end, side="left"))
+        if self._reach is None:
+            # Running max of ends: no segment before the first that reaches ``start`` can overlap it
+            self._reach = np.maximum.accumulate(self.ends) if len(self) else self.ends
+        lo = int(np.searchsorted(self._reach, start, side="right"))
+        view = SegmentStore(self._c, self._lo + lo, self._lo + max(lo, hi))
+        keep = view.ends > start
+        if keep.all():
+            return view
+        return SegmentStore.from_segments(view[int(i)] for i in np.flatnonzero(keep))
+
+    def _index(self, i: int) -> int:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return self._lo + i
+
+    def _materialize(self) -> Dict[str, np.ndarray]:
+        # Columns for just this view, with offsets rebased to zero
+        c, lo, hi = self._c, self._lo, self._hi
+        t0, t1 = int(c["text_off"][lo]), int(c["text_off"][hi])
+        out = {
+            "start": c["start"][lo:hi],
+            "end": c["end"][lo:hi],
+            "text_off": c["text_off"][lo : hi + 1] - t0,
+            "text": c["text"][t0:t1],
+        }
+        if self.has_words:
+            k0, k1 = int(c["word_idx"][lo]), int(c["word_idx"][hi])
+            w0, w1 = int(c["word_off"][k0]), int(c["word_off"][k1])
+            out.update(
+                word_idx=c["word_idx"][lo : hi + 1] - k0,
+                word_start=c["word_start"][k0:k1],
+                word_end=c["word_end"][k0:k1],
+                word_off=c["word_off"][k0 : k1 + 1] - w0,
+                word_text=c["word_text"][w0:w1],
+            )
+        return out
+
+
+def _offsets(lengths: Iterable[int]) -> np.ndarray:
+    lengths = np.fromiter(lengths, dtype=np.int64)
+    out = np.zeros(lengths.shape[0] + 1, dtype=np.int64)
+    np.cumsum(lengths, out=out[1:])
+    return out
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
@@ -1,24 +1,174 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import re
+from bisect import bisect_left, bisect_right
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
 
+from .metrics import span
 
-def merge_segments(existing: List[Dict], new: List[Dict], tolerance_sec: float = 0.75) -> List[Dict]:
-    """Merge with simple de-duplication based on timestamp proximity and text equality.
-    Keeps order stable, appends only non-duplicate segments.
+
+_NORM_RE = re.compile(r"[^\w']+")
+
+
+class Stitcher:
+    """Incremental segment merger that keeps segments sorted by start time.
+
+    Each ``add`` only looks at segments inside the new segment's time window
+    (found by bisect). Chunks normally arrive in time order, so segments are
+    appended and stitching a whole recording is O(n log n); a segment that
+    starts before the last one is inserted into the list, which is O(n), so
+    input in reverse order degrades to O(n^2). Where a new segment overlaps
+    earlier text, the repeated words are trimmed from the new segment: by time
+    when both sides carry word timestamps (``words``: ``[start, end, word]``
+    triples), else by token alignment. Fully repeated segments are dropped. Segments passed to one ``extend`` call come from the
+    same chunk and are never compared with each other, so a short phrase said
+    twice in a row is kept.
     """
-    out = list(existing)
-    for seg in new:
-        if not any(_is_dup(seg, e, tolerance_sec) for e in existing):
-            out.append(seg)
-    return out
 
+    def __init__(
+        self,
+        tolerance_sec: float = 0.75,
+        min_match: int = 2,
+        slack: int = 2,
+        max_tokens: int = 200,
+    ):
+        self.tolerance_sec = tolerance_sec
+        self.min_match = min_match
+        self.slack = slack
+        self.max_tokens = max_tokens
+        self.segments: List[Dict] = []
+        self._starts: List[float] = []
+        self._max_dur = 0.0
+        # ids of the segments kept by the running extend() call
+        self._fresh: set = set()
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict], **kwargs) -> "Stitcher":
+        """Start from existing segments: a list of dicts or a (time-sliced) ``SegmentStore``."""
+        st = cls(**kwargs)
+        if hasattr(segments, "starts"):
+            # Stores are sorted already: take the columns as they are
+            st.segments = list(segments)
+            st._starts = [float(x) for x in segments.starts]
+            st._max_dur = max(0.0, float((segments.ends - segments.starts).max())) if len(segments) else 0.0
+            return st
+        for seg in sorted(segments, key=lambda s: float(s.get("start", 0))):
+            st._insert(seg)
+        return st
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def extend(self, new: List[Dict]) -> List[Dict]:
+        """Add ``new`` segments; return the ones kept (possibly trimmed)."""
+        kept = []
+        with span("stitch.extend"):
+            try:
+                for seg in new:
+                    out = self.add(seg)
+                    if out is not None:
+                        kept.append(out)
+                        self._fresh.add(id(out))
+            finally:
+                self._fresh = set()
+        return kept
+
+    def add(self, seg: Dict) -> Optional[Dict]:
+        start = float(seg.get("start", 0))
+        end = float(seg.get("end", start))
+        text = seg.get("text", "").strip()
+
+        # Segments from earlier calls that can overlap [start - tol, end]
+        lo = bisect_left(self._starts, start - self.tolerance_sec - self._max_dur)
+        hi = bisect_right(self._starts, end + self.tolerance_sec)
+        overlapping = [
+            e for e in self.segments[lo:hi]
+            if id(e) not in self._fresh
+            and float(e.get("end", 0)) > start - self.tolerance_sec
+            and float(e.get("start", 0)) <= end
+        ]
+        if not overlapping:
+            return self._insert(seg)
+        for e in overlapping:
+            if abs(float(e.get("start", 0)) - start) <= self.tolerance_sec and e.get("text", "").strip() == text:
+                return None
+        if seg.get("words") and all(e.get("words") for e in overlapping):
+            return self._add_timed(seg, overlapping)
+
+        words = text.split()
+        trim = self._aligned_prefix(overlapping, words)
+        if trim == 0:
+            return self._insert(seg)
+        if trim >= len(words):
+            return None
+        # Keep only the unseen tail; move the start proportionally into the segment
+        out = dict(seg)
+        out["text"] = " ".join(words[trim:])
+        out["start"] = start + (end - start) * trim / len(words)
+        return self._insert(out)
+
+    def _add_timed(self, seg: Dict, overlapping: List[Dict]) -> Optional[Dict]:
+        # Words centred in audio the earlier segments already cover are repeats
+        covered = max(float(e.get("end", 0)) for e in overlapping)
+        words = [w for w in seg["words"] if (float(w[0]) + float(w[1])) / 2 > covered]
+        if not words:
+            return None
+        if len(words) == len(seg["words"]):
+            return self._insert(seg)
+        out = dict(seg)
+        out["words"] = words
+        out["text"] = " ".join(w[2] for w in words)
+        out["start"] = float(words[0][0])
+        return self._insert(out)
+
+    def _aligned_prefix(self, overlapping: List[Dict], words: List[str]) -> int:
+        """Number of leading ``words`` already present at the end of ``overlapping``."""
+        tail: List[str] = []
+        for e in overlapping:
+            tail.extend(_norm(w) for w in e.get("text", "").split())
+        tail = tail[-self.max_tokens :]
+        head = [_norm(w) for w in words[: self.max_tokens]]
+        if not tail or not head:
+            return 0
+
+        best = 0
+        sm = SequenceMatcher(None, tail, head, autojunk=False)
+        for a, b, size in sm.get_matching_blocks():
+            # Fewer words match by chance; exact repeats are caught in add()
+            if size < self.min_match:
+                continue
+            # The repeated words must reach the end of the earlier text and
+            # start near the beginning of the new one
+            if a + size >= len(tail) - self.slack and b <= max(self.slack, size):
+                best = max(best, b + size)
+        return best
+
+    def _insert(self, seg: Dict) -> Dict:
+        start = float(seg.get("start", 0))
+        if not self._starts or start >= self._starts[-1]:
+            # In-order input, the common case: append in O(1)
+            self._starts.append(start)
+            self.segments.append(seg)
+        else:
+            i = bisect_right(self._starts, start)
+            self._starts.insert(i, start)
+            self.segments.insert(i, seg)
+        self._max_dur = max(self._max_dur, float(seg.get("end", start)) - start)
+        return seg
+
+
+def merge_segments(existing: List[Dict], new: List[Dict], tolerance_sec: float = 0.75) -> List[Dict]:
+    """Merge with de-duplication based on timestamp proximity and token overlap.
+
+    Functional wrapper around ``Stitcher`` that leaves ``existing`` untouched.
+    Long-running callers should keep a ``Stitcher`` instead, which avoids
+    copying the whole transcript on every call.
+    """
+    st = Stitcher.from_segments(existing, tolerance_sec=tolerance_sec)
+    st.extend(new)
+    return st.segments
 
-def _is_dup(a: Dict, b: Dict, tol: float) -> bool:
-    if abs(float(a.get("start", 0)) - float(b.get("start", 0))) <= tol:
-        at = a.get("text", "").strip()
-        bt = b.get("text", "").strip()
-        if at == bt or (at in bt) or (bt in at):
-            return True
-    return False
 
+def _norm(word: str) -> str:
+    return _NORM_RE.sub("", word.lower())
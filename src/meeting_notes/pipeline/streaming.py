@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+Word = Tuple[float, float, str]
+
+_NORM_RE = re.compile(r"[^\w']+")
+
+
+class LocalAgreementStreamer:
+    """Streaming wrapper for offline models using a LocalAgreement-2 policy.
+
+    Only the uncommitted audio tail is re-decoded on each ``process`` call.
+    A word is committed once two consecutive hypotheses agree on it (longest
+    common prefix); the buffer is then cut at the last committed word, so the
+    tail stays a few seconds long instead of a full window.
+    """
+
+    def __init__(
+        self,
+        backend,
+        language: Optional[str] = None,
+        vad: Optional[bool] = None,
+        sr: int = 16000,
+        max_buffer_sec: float = 15.0,
+        prompt_chars: int = 200,
+    ):
+        self.backend = backend
+        self.language = language
+        self.vad = vad
+        self.sr = sr
+        self.max_buffer_sec = max_buffer_sec
+        self.prompt_chars = prompt_chars
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.offset = 0.0  # stream time of self.audio[0]
+        self.committed_until = 0.0
+        self.pending: List[Word] = []
+        self._prompt = ""
+
+    def insert_audio(self, block: np.ndarray) -> None:
+        self.audio = np.concatenate([self.audio, block.reshape(-1).astype(np.float32, copy=False)])
+
+    def skip_silence(self, block: np.ndarray, keep_sec: float = 2.0) -> None:
+        """Take a block without speech without decoding it.
+
+        Only call this while nothing is pending; the buffer is cut back to
+        ``keep_sec`` of lead-in for the next utterance.
+        """
+        self.insert_audio(block)
+        self._trim(self.offset + self.audio.shape[0] / self.sr - keep_sec)
+
+    def process(self) -> List[Dict]:
+        """Decode the uncommitted tail and return newly committed segments."""
+        if not self.audio.size:
+            return []
+        words = self.backend.transcribe_words(
+            self.audio, language=self.language, vad=self.vad, prompt=self._prompt[-self.prompt_chars :]
+        )
+        hyp = [
+            (s + self.offset, e + self.offset, w)
+            for s, e, w in words
+            if w and e + self.offset > self.committed_until
+        ]
+        n = 0
+        while n < min(len(hyp), len(self.pending)) and _norm(hyp[n][2]) == _norm(self.pending[n][2]):
+            n += 1
+        commit, self.pending = hyp[:n], hyp[n:]
+
+        if commit:
+            self.committed_until = commit[-1][1]
+            self._trim(self.committed_until)
+        elif self.audio.shape[0] > self.max_buffer_sec * self.sr:
+            # Nothing stabilizes (noise, babble): drop the oldest audio
+            self._trim(self.offset + self.audio.shape[0] / self.sr - self.max_buffer_sec)
+        return self._segments(commit)
+
+    def finish(self) -> List[Dict]:
+        """Commit whatever the last hypothesis holds; call once the input ends."""
+        tail, self.pending = self.pending, []
+        if tail:
+            self.committed_until = tail[-1][1]
+        self.audio = np.zeros(0, dtype=np.float32)
+        return self._segments(tail)
+
+    def _trim(self, t: float) -> None:
+        cut = int((t - self.offset) * self.sr)
+        if cut <= 0:
+            return
+        self.audio = self.audio[cut:].copy()
+        self.offset += cut / self.sr
+        self.pending = [w for w in self.pending if w[1] > self.offset]
+
+    def _segments(self, words: List[Word]) -> List[Dict]:
+        if not words:
+            return []
+        text = " ".join(w[2] for w in words)
+        self._prompt = f"{self._prompt} {text}".strip()[-4 * self.prompt_chars :]
+        return [{"start": float(words[0][0]), "end": float(words[-1][1]), "text": text}]
+
+
+class NemoCacheAwareStreamer:
+    """Cache-aware streaming for NeMo FastConformer models trained for it.
+
+    Features are computed per incoming block and fed to
+    ``conformer_stream_step`` chunk by chunk with the encoder caches carried
+    over, so every audio frame is encoded exactly once. The decoder output is
+    already final, so words are committed as soon as they appear.
+    """
+
+    def __init__(self, nemo_backend, sr: int = 16000, context_sec: float = 0.2):
+        import torch  # type: ignore
+
+        self.torch = torch
+        self.model = nemo_backend.backend
+        self.model.eval()
+        self.sr = sr
+        self.device = next(self.model.parameters()).device
+        enc = self.model.encoder
+        scfg = enc.streaming_cfg
+        self.chunk = [_pick(scfg.chunk_size, 0), _pick(scfg.chunk_size, 1)]
+        self.shift = [_pick(scfg.shift_size, 0), _pick(scfg.shift_size, 1)]
+        self.pre_cache = [_pick(scfg.pre_encode_cache_size, 0), _pick(scfg.pre_encode_cache_size, 1)]
+        self.drop_extra = scfg.drop_extra_pre_encoded
+        self.hop = float(getattr(self.model.cfg.preprocessor, "window_stride", 0.01))
+        self.caches = enc.get_initial_cache_state(batch_size=1)
+        self.context = np.zeros(int(context_sec * sr), dtype=np.float32)
+        self.feats = None  # [1, D, T]; the first `self.ctx` frames are pre-encode context
+        self.ctx = 0
+        self.step = 0
+        self.frames_done = 0
+        self.prev_hyp = None
+        self.prev_pred = None
+        self.emitted = 0
+        self.last_end = 0.0
+
+    def insert_audio(self, block: np.ndarray) -> None:
+        torch = self.torch
+        block = block.reshape(-1).astype(np.float32, copy=False)
+        sig = np.concatenate([self.context, block])
+        with torch.inference_mode():
+            x = torch.from_numpy(sig)[None].to(self.device)
+            feats, _ = self.model.preprocessor(input_signal=x, length=torch.tensor([x.shape[1]], device=self.device))
+        # Drop frames belonging to the audio context and the edge-padded last frame
+        drop = int(round(self.context.shape[0] / self.sr / self.hop))
+        feats = feats[..., drop:-1]
+        self.feats = feats if self.feats is None else torch.cat([self.feats, feats], dim=-1)
+        self.context = sig[-self.context.shape[0] :] if self.context.shape[0] else self.context
+
+    def process(self, final: bool = False) -> List[Dict]:
+        torch = self.torch
+        out: List[Dict] = []
+        while self.feats is not None:
+            first = 0 if self.step == 0 else 1
+            size, shift = self.chunk[first], self.shift[first]
+            avail = self.feats.shape[-1] - self.ctx
+            if avail <= 0 or (avail < size and not final):
+                break
+            body = self.feats[..., self.ctx : self.ctx + size]
+            if self.step == 0:
+                pre = torch.zeros(*body.shape[:-1], self.pre_cache[0], device=self.device, dtype=body.dtype)
+            else:
+                pre = self.feats[..., : self.ctx]
+            chunk = torch.cat([pre, body], dim=-1)
+            last = final and avail <= size
+            with torch.inference_mode():
+                res = self.model.conformer_stream_step(
+                    processed_signal=chunk,
+                    processed_signal_length=torch.tensor([chunk.shape[-1]], device=self.device),
+                    cache_last_channel=self.caches[0],
+                    cache_last_time=self.caches[1],
+                    cache_last_channel_len=self.caches[2],
+                    keep_all_outputs=last,
+                    previous_hypotheses=self.prev_hyp,
+                    previous_pred_out=self.prev_pred,
+                    drop_extra_pre_encoded=0 if self.step == 0 else self.drop_extra,
+                    return_transcription=True,
+                )
+            self.prev_pred, texts = res[0], res[1]
+            self.caches = (res[2], res[3], res[4])
+            self.prev_hyp = res[5] if len(res) > 5 else None
+            self.step += 1
+            self.frames_done += min(shift, avail)
+
+            # Keep the last pre-encode frames before the new read position as context
+            pos = self.ctx + shift
+            keep = max(0, pos - self.pre_cache[1])
+            self.feats = self.feats[..., keep:]
+            self.ctx = pos - keep
+
+            words = _hyp_text(texts).split()
+            if len(words) > self.emitted:
+                end = self.frames_done * self.hop
+                out.append({"start": self.last_end, "end": end, "text": " ".join(words[self.emitted :])})
+                self.emitted = len(words)
+                self.last_end = end
+            if last:
+                self.feats = None
+        return out
+
+    def finish(self) -> List[Dict]:
+        return self.process(final=True)
+
+
+def make_streamer(backend, cfg: Dict, sr: int = 16000):
+    """Pick cache-aware NeMo streaming when the model supports it, else LocalAgreement."""
+    live = cfg.get("live", {})
+    if getattr(backend, "backend_name", None) == "nemo" and supports_cache_aware(backend.backend):
+        return NemoCacheAwareStreamer(backend, sr=sr)
+    return LocalAgreementStreamer(
+        backend,
+        language=cfg.get("language"),
+        vad=cfg.get("vad"),
+        sr=sr,
+        max_buffer_sec=float(live.get("max_buffer_sec", 15.0)),
+    )
+
+
+def supports_cache_aware(model) -> bool:
+    # Only models trained with a limited attention context stream with caches
+    enc = getattr(model, "encoder", None)
+    att = getattr(enc, "att_context_size", None)
+    return (
+        hasattr(model, "conformer_stream_step")
+        and getattr(enc, "streaming_cfg", None) is not None
+        and att is not None
+        and len(att) > 1
+        and int(att[1]) >= 0
+    )
+
+
+def _pick(v, i: int) -> int:
+    return int(v[i]) if isinstance(v, (list, tuple)) else int(v)
+
+
+def _hyp_text(texts) -> str:
+    x = texts[0] if isinstance(texts, (list, tuple)) and texts else texts
+    if isinstance(x, (list, tuple)) and x:
+        x = x[0]
+    txt = getattr(x, "text", x)
+    return txt if isinstance(txt, str) else ""
+
+
+def _norm(word: str) -> str:
+    return _NORM_RE.sub("", word.lower())
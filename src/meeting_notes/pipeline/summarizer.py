@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import io
+import json
+import queue
 import re
-from typing import Dict, List, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from .cache import ContentCache, content_key
 from .io_utils import load_yaml
+from .metrics import bind, current
 
 
 from pathlib import Path
@@ -12,78 +20,550 @@ from importlib.resources import files
 
 LLM_CONFIG_PATH = Path("configs/llm.yaml")
 
+# Loaded models per (model path, context, gpu layers), and evaluated prompt-prefix states
+_LLMS: Dict[Tuple, Any] = {}
+_LLMS_LOCK = threading.Lock()
+_PREFIX_STATES: Dict[str, Any] = {}
 
-def summarize(segments: List[Dict]) -> Tuple[Dict, str]:
-    cfg = load_yaml(LLM_CONFIG_PATH)
+# Prompt files that shape a full summary; map partials only depend on the first two
+SUMMARY_PROMPTS = (
+    "meeting_notes_system.txt",
+    "meeting_notes_map_user.txt",
+    "meeting_notes_user.txt",
+    "meeting_notes_reduce_user.txt",
+)
+
+
+def summarize(segments: List[Dict], llm: Optional[Any] = None, cfg: Optional[Dict] = None) -> Tuple[Dict, str]:
+    """Summarize transcript segments into notes.
+
+    Transcripts that fit the model context are summarized in one call; longer
+    ones are summarized per window and the partial notes merged. Pass an
+    already loaded ``llm`` (see ``load_llm``) to skip model loading, as the
+    ``serve`` daemon does. Results are cached on the transcript text,
+    prompts, model and sampling settings, so a cache hit never loads the
+    model. ``cfg`` overrides ``configs/llm.yaml``. See ``summarize_stream``
+    for incremental output.
+    """
+    for event in summarize_stream(segments, llm=llm, cfg=cfg):
+        if event["type"] == "done":
+            return event["notes"], event["markdown"]
+    raise RuntimeError("Summarizer finished without producing notes")
+
+
+def summarize_stream(segments: List[Dict], llm: Optional[Any] = None, cfg: Optional[Dict] = None) -> Iterator[Dict]:
+    """Like ``summarize``, but yield events while the notes are generated.
+
+    Events are ``{"type": "token", "text"}`` for each generated piece of text,
+    ``{"type": "item", "section", "text"}`` as soon as a bullet line under
+    one of the three sections is complete, and finally
+    ``{"type": "done", "notes", "markdown"}`` with what ``summarize`` returns.
+    For long transcripts only the final merge is streamed.
+    """
+    cfg = cfg if cfg is not None else load_yaml(LLM_CONFIG_PATH)
     # Load prompts from package resources
-    system_prompt = files("meeting_notes.prompts").joinpath("meeting_notes_system.txt").read_text().strip()  # type: ignore
-    user_template = files("meeting_notes.prompts").joinpath("meeting_notes_user.txt").read_text()  # type: ignore
+    system_prompt = _prompt("meeting_notes_system.txt").strip()
+    user_template = _prompt("meeting_notes_user.txt")
+
+    lines = _segments_to_lines(segments)
+    store = _summary_cache(cfg)
+    hit = None
+    if store is not None:
+        key = content_key("notes", _summary_settings(cfg, SUMMARY_PROMPTS), lines)
+        hit = store.get(key)
+
+    current().inc("llm.summary_cache_hit" if isinstance(hit, str) else "llm.summary_cache_miss")
+    if isinstance(hit, str):
+        chunks: Iterator[str] = iter([hit])
+    else:
+        if llm is None:
+            llm = get_llm(cfg)
+
+        ctx = int(cfg.get("context", 4096))
+        samp = cfg.get("sampling", {})
+        max_tokens = int(samp.get("max_tokens", 1024))
+
+        transcript_text = "\n".join(lines)
+        budget = _prompt_budget(llm, ctx, system_prompt, user_template, max_tokens)
+        if _n_tokens(llm, transcript_text) <= budget:
+            template = user_template
+            user_prompt = user_template.replace("{{TRANSCRIPT}}", transcript_text)
+        else:
+            template = _prompt("meeting_notes_reduce_user.txt")
+            partials = _map_partials(llm, cfg, system_prompt, lines, store)
+            user_prompt = _reduce_prompt(llm, cfg, system_prompt, template, partials)
+        _restore_prefix(llm, cfg, system_prompt, template)
+        chunks = _chat_stream(llm, system_prompt, user_prompt, samp, max_tokens)
+
+    parser = _NotesParser()
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield {"type": "token", "text": chunk}
+        for section, item in parser.feed(chunk):
+            yield {"type": "item", "section": section, "text": item}
+    for section, item in parser.close():
+        yield {"type": "item", "section": section, "text": item}
+
+    text = "".join(parts).strip()
+    _record_llm_rates()
+    if store is not None and not isinstance(hit, str):
+        store.put(key, text)
+    yield {"type": "done", "notes": _notes_dict(text, cfg), "markdown": text}
+
+
+def cached_summary(segments: List[Dict]) -> Optional[Tuple[Dict, str]]:
+    """Return ``summarize``'s result from the summary cache, or None on a miss."""
+    cfg = load_yaml(LLM_CONFIG_PATH)
+    store = _summary_cache(cfg)
+    if store is None:
+        return None
+    key = content_key("notes", _summary_settings(cfg, SUMMARY_PROMPTS), _segments_to_lines(segments))
+    hit = store.get(key)
+    return (_notes_dict(hit, cfg), hit) if isinstance(hit, str) else None
+
+
+def _summary_cache(cfg: Dict) -> Optional[ContentCache]:
+    sc = cfg.get("summary_cache", {})
+    if not bool(sc.get("enabled", False)):
+        return None
+    return ContentCache("summary", max_mb=float(sc.get("max_mb", 256)))
+
+
+def _summary_settings(cfg: Dict, prompts: Tuple[str, ...]) -> Dict:
+    # Everything besides the transcript that changes what the model is asked
+    samp = cfg.get("sampling", {})
+    return {
+        "model": _model_identity(cfg),
+        "context": int(cfg.get("context", 4096)),
+        "sampling": {
+            "temperature": float(samp.get("temperature", 0.2)),
+            "top_p": float(samp.get("top_p", 0.9)),
+            "max_tokens": int(samp.get("max_tokens", 1024)),
+        },
+        "map_max_tokens": int(cfg.get("map_reduce", {}).get("map_max_tokens", 512)),
+        "prompts": {name: content_key(_prompt(name)) for name in prompts},
+    }
+
+
+def _notes_dict(text: str, cfg: Dict) -> Dict:
+    samp = cfg.get("sampling", {})
+    notes = _parse_notes(text)
+    notes["model_info"] = {
+        "backend": cfg.get("backend", "llama-cpp"),
+        "model": str(_model_path(cfg).name),
+        "context": int(cfg.get("context", 4096)),
+        "gpu_layers": int(cfg.get("gpu_layers", 0)),
+        "sampling": {
+            "temperature": float(samp.get("temperature", 0.2)),
+            "top_p": float(samp.get("top_p", 0.9)),
+            "max_tokens": int(samp.get("max_tokens", 1024)),
+        },
+    }
+    notes["markdown"] = text
+    return notes
+
+
+class RollingSummarizer:
+    """Keeps meeting notes up to date while a live session is running.
+
+    Committed segments are queued with ``add``; a background thread folds the
+    new text into the previous notes every ``live_notes.interval_min``
+    minutes and rewrites ``notes.md``. Each update only sends the new text
+    plus the current notes, so ``finish`` after Ctrl+C only has the last few
+    minutes left to process.
+    """
+
+    def __init__(self, out_md: str | Path, llm: Optional[Any] = None, cfg: Optional[Dict] = None):
+        self.cfg = cfg if cfg is not None else load_yaml(LLM_CONFIG_PATH)
+        live = self.cfg.get("live_notes", {})
+        self.interval_sec = float(live.get("interval_min", 5)) * 60
+        self.max_tokens = int(live.get("max_tokens", 768))
+        self.out_md = Path(out_md)
+        self.llm = llm
+        self.system_prompt = _prompt("meeting_notes_system.txt").strip()
+        self.template = _prompt("meeting_notes_update_user.txt")
+        self.notes_md = ""
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._metrics = current()
+        self._thread = threading.Thread(target=self._run, name="rolling-notes", daemon=True)
+
+    def start(self) -> "RollingSummarizer":
+        self._thread.start()
+        return self
+
+    def add(self, segments: List[Dict]) -> None:
+        with self._lock:
+            self._pending.extend(segments)
+
+    def update(self) -> bool:
+        """Fold all pending segments into the notes; returns False if there was nothing new."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return False
+        if self.llm is None:
+            self.llm = get_llm(self.cfg)
+        ctx = int(self.cfg.get("context", 4096))
+        samp = self.cfg.get("sampling", {})
+        lines = _segments_to_lines(pending)
+        done = 0
+        try:
+            while done < len(lines):
+                notes = self.notes_md or "(none yet)"
+                budget = _prompt_budget(self.llm, ctx, self.system_prompt, self.template, self.max_tokens)
+                budget = max(64, budget - _n_tokens(self.llm, notes))
+                window = _token_windows(self.llm, lines[done:], budget)[0]
+                prompt = self.template.replace("{{NOTES}}", notes).replace("{{TRANSCRIPT}}", "\n".join(window))
+                _restore_prefix(self.llm, self.cfg, self.system_prompt, self.template)
+                self.notes_md = _chat(self.llm, self.system_prompt, prompt, samp, self.max_tokens)
+                done += len(window)
+        finally:
+            if done < len(pending):
+                # Retry the unprocessed text on the next update
+                with self._lock:
+                    self._pending[:0] = pending[done:]
+        self._write(self.out_md, self.notes_md)
+        return True
+
+    def finish(self) -> Tuple[Dict, str]:
+        """Stop the background thread, fold in the remaining text and return the final notes."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.update()
+        _record_llm_rates()
+        return _notes_dict(self.notes_md, self.cfg), self.notes_md
+
+    def _run(self) -> None:
+        with bind(self._metrics):
+            while not self._stop.wait(self.interval_sec):
+                try:
+                    self.update()
+                except Exception as e:  # keep transcribing even if one update fails
+                    print(f"[notes] update failed: {e}")
+
+    @staticmethod
+    def _write(path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(text)
+        tmp.replace(path)
+
+
+def _map_partials(
+    llm: Any, cfg: Dict, system_prompt: str, lines: List[str], store: Optional[ContentCache] = None
+) -> List[str]:
+    """Summarize token-budgeted transcript windows into partial notes.
+
+    Windows are cut on segment boundaries so every line keeps its [mm:ss]
+    stamp. With ``map_reduce.workers`` > 1 extra model instances are loaded
+    and map calls run concurrently (llama.cpp releases the GIL while decoding).
+    Partial notes are cached per window when ``store`` is given; windows are
+    packed from the start, so a transcript that grew only recomputes its tail.
+    """
+    ctx = int(cfg.get("context", 4096))
+    samp = cfg.get("sampling", {})
+    mr = cfg.get("map_reduce", {})
+    map_tokens = int(mr.get("map_max_tokens", 512))
+    workers = max(1, int(mr.get("workers", 1)))
+    map_template = _prompt("meeting_notes_map_user.txt")
+
+    budget = _prompt_budget(llm, ctx, system_prompt, map_template, map_tokens)
+    windows = _token_windows(llm, lines, budget)
+    settings = _summary_settings(cfg, SUMMARY_PROMPTS[:2])
+
+    keys = [content_key("map", settings, i, w) for i, w in enumerate(windows)]
+    partials: List[Optional[str]] = [None] * len(windows)
+    if store is not None:
+        for i, key in enumerate(keys):
+            hit = store.get(key)
+            partials[i] = hit if isinstance(hit, str) else None
+    todo = [i for i, p in enumerate(partials) if p is None]
+
+    def _map(i: int, model: Any) -> None:
+        window = windows[i]
+        prompt = (
+            map_template.replace("{{PART}}", str(i + 1))
+            .replace("{{RANGE}}", _line_range(window))
+            .replace("{{TRANSCRIPT}}", "\n".join(window))
+        )
+        _restore_prefix(model, cfg, system_prompt, map_template)
+        partials[i] = f"Part {i + 1} ({_line_range(window)}):\n" + _chat(model, system_prompt, prompt, samp, map_tokens)
+        if store is not None:
+            store.put(keys[i], partials[i])
+
+    if workers > 1 and len(todo) > 1:
+        models = [llm] + [load_llm(cfg) for _ in range(min(workers, len(todo)) - 1)]
+        idle: "queue.Queue[Any]" = queue.Queue()
+        for m in models:
+            idle.put(m)
+        metrics = current()
+
+        def _map_any(i: int) -> None:
+            # Check a model out for the call: a llama.cpp context is not thread-safe
+            model = idle.get()
+            try:
+                with bind(metrics):
+                    _map(i, model)
+            finally:
+                idle.put(model)
+
+        with ThreadPoolExecutor(max_workers=len(models)) as pool:
+            list(pool.map(_map_any, todo))
+    else:
+        for i in todo:
+            _map(i, llm)
+    return partials
+
+
+def _reduce_prompt(llm: Any, cfg: Dict, system_prompt: str, template: str, partials: List[str]) -> str:
+    """Merge ``partials`` until they fit one reduce call; return that call's user prompt."""
+    samp = cfg.get("sampling", {})
+    max_tokens = int(samp.get("max_tokens", 1024))
+    budget = _prompt_budget(llm, int(cfg.get("context", 4096)), system_prompt, template, max_tokens)
+    groups = _token_windows(llm, partials, budget, sep="\n\n")
+    while len(groups) > 1:
+        # Still too many partials for one context: merge the merges
+        merged = []
+        for group in groups:
+            _restore_prefix(llm, cfg, system_prompt, template)
+            merged.append(_chat(llm, system_prompt, template.replace("{{NOTES}}", "\n\n".join(group)), samp, max_tokens))
+        fewer = _token_windows(llm, merged, budget, sep="\n\n")
+        if len(fewer) >= len(groups):
+            # Each merge fills the budget alone (max_tokens too large for the context): another
+            # round would not shrink the list, so reduce their truncated concatenation instead
+            print(f"[notes] reduce budget of {budget} tokens cannot merge {len(merged)} partial notes; truncating")
+            fewer = _token_windows(llm, ["\n\n".join(merged)], budget)
+        groups = fewer
+    return template.replace("{{NOTES}}", "\n\n".join(groups[0] if groups else []))
 
-    transcript_text = _segments_to_text(segments)
-    user_prompt = user_template.replace("{{TRANSCRIPT}}", transcript_text)
 
+def _chat(llm: Any, system_prompt: str, user_prompt: str, samp: Dict, max_tokens: int) -> str:
+    # Streamed internally so prompt eval and generation are timed separately
+    return "".join(_chat_stream(llm, system_prompt, user_prompt, samp, max_tokens)).strip()
+
+
+def _chat_stream(llm: Any, system_prompt: str, user_prompt: str, samp: Dict, max_tokens: int) -> Iterator[str]:
+    metrics = current()
+    metrics.inc("llm.calls")
+    metrics.inc("llm.prompt_tokens", _n_tokens(llm, system_prompt) + _n_tokens(llm, user_prompt))
+    t0 = time.perf_counter()
+    first = None
+    pieces = 0
+    try:
+        for chunk in llm.create_chat_completion(stream=True, **_chat_args(system_prompt, user_prompt, samp, max_tokens)):
+            text = chunk["choices"][0].get("delta", {}).get("content")
+            if text:
+                if first is None:
+                    # Time to first token is dominated by prompt evaluation
+                    first = time.perf_counter()
+                    metrics.observe("llm.prompt_eval", first - t0)
+                pieces += 1
+                yield text
+    finally:
+        if first is not None:
+            metrics.observe("llm.generate", time.perf_counter() - first)
+        metrics.inc("llm.completion_tokens", pieces)
+
+
+def _record_llm_rates() -> None:
+    metrics = current()
+    gen, prompt = metrics.total("llm.generate"), metrics.total("llm.prompt_eval")
+    if gen:
+        metrics.gauge("llm.tokens_per_sec", round(metrics.counters.get("llm.completion_tokens", 0) / gen, 2))
+    if prompt:
+        metrics.gauge("llm.prompt_tokens_per_sec", round(metrics.counters.get("llm.prompt_tokens", 0) / prompt, 2))
+
+
+def _chat_args(system_prompt: str, user_prompt: str, samp: Dict, max_tokens: int) -> Dict:
+    return {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": float(samp.get("temperature", 0.2)),
+        "top_p": float(samp.get("top_p", 0.9)),
+        "max_tokens": max_tokens,
+    }
+
+
+def _n_tokens(llm: Any, text: str) -> int:
+    return len(llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+
+def _prompt_budget(llm: Any, ctx: int, system_prompt: str, template: str, max_tokens: int) -> int:
+    # Room left for transcript text after the fixed prompt, the answer and chat-template overhead
+    fixed = _n_tokens(llm, system_prompt) + _n_tokens(llm, re.sub(r"\{\{\w+\}\}", "", template))
+    return max(64, ctx - fixed - max_tokens - 64)
+
+
+def _token_windows(llm: Any, items: List[str], budget: int, sep: str = "\n") -> List[List[str]]:
+    """Greedily pack ``items`` into windows of at most ``budget`` tokens."""
+    sep_tokens = _n_tokens(llm, sep)
+    windows: List[List[str]] = []
+    cur: List[str] = []
+    used = 0
+    for item in items:
+        n = _n_tokens(llm, item)
+        if n > budget:
+            # A single oversized item: keep its head so the window still fits
+            item = llm.detokenize(llm.tokenize(item.encode("utf-8"), add_bos=False)[:budget]).decode("utf-8", "ignore")
+            n = budget
+        if cur and used + sep_tokens + n > budget:
+            windows.append(cur)
+            cur, used = [], 0
+        used += n + (sep_tokens if cur else 0)
+        cur.append(item)
+    if cur:
+        windows.append(cur)
+    return windows
+
+
+def _line_range(window: List[str]) -> str:
+    stamps = [m.group(1) for m in (re.match(r"\[(\d+:\d+)\]", ln) for ln in window) if m]
+    return f"[{stamps[0]}]-[{stamps[-1]}]" if stamps else "an unknown time range"
+
+
+def _prompt(name: str) -> str:
+    return files("meeting_notes.prompts").joinpath(name).read_text()  # type: ignore
+
+
+def get_llm(cfg: Optional[Dict] = None):
+    """Return a process-wide model instance for this config, loading it once."""
+    cfg = cfg if cfg is not None else load_yaml(LLM_CONFIG_PATH)
+    key = (str(_model_path(cfg)), int(cfg.get("context", 4096)), int(cfg.get("gpu_layers", 0)))
+    with _LLMS_LOCK:
+        if key not in _LLMS:
+            with current().span("llm.load"):
+                _LLMS[key] = load_llm(cfg)
+        return _LLMS[key]
+
+
+def _restore_prefix(llm: Any, cfg: Dict, system_prompt: str, template: str) -> None:
+    """Put the KV cache in the state right after the prompt's fixed prefix.
+
+    The prefix is the chat-formatted system prompt plus the template text up
+    to its first placeholder. Its state is evaluated once, kept in memory and
+    saved to ``data/cache/llm-prefix`` so cold starts skip it too. llama.cpp
+    then only evaluates the tokens after the longest matching prefix.
+    """
+    pc = cfg.get("prefix_cache", {})
+    if not bool(pc.get("enabled", False)) or not hasattr(llm, "save_state"):
+        return
+    prefix = _chat_prefix(system_prompt, template.split("{{", 1)[0])
+    tokens = llm.tokenize(prefix.encode("utf-8"), add_bos=True, special=True)
+    n = len(tokens)
+    if llm.n_tokens >= n and list(llm.input_ids[:n]) == list(tokens):
+        return  # already warm from the previous call
+    key = content_key("prefix", _model_identity(cfg), int(cfg.get("context", 4096)), list(tokens))
+    with current().span("llm.prefix_restore"):
+        state = _PREFIX_STATES.get(key)
+        if state is None:
+            store = ContentCache("llm-prefix", max_mb=float(pc.get("max_mb", 1024)))
+            blob = store.get_bytes(key, suffix=".npz")
+            state = _unpack_state(blob) if blob is not None else None
+            if state is None:
+                llm.reset()
+                llm.eval(tokens)
+                state = llm.save_state()
+                store.put_bytes(key, _pack_state(state), suffix=".npz")
+            _PREFIX_STATES[key] = state
+        llm.load_state(state)
+
+
+def _pack_state(state: Any) -> bytes:
+    # Plain arrays and a JSON header, never a pickle: the cache directory is just files
+    import numpy as np
+
+    header = {"version": 1, "n_tokens": int(state.n_tokens), "seed": getattr(state, "seed", None)}
+    buf = io.BytesIO()
+    np.savez(
+        buf,
+        header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+        input_ids=np.asarray(state.input_ids),
+        scores=np.asarray(state.scores),
+        llama_state=np.frombuffer(bytes(state.llama_state), dtype=np.uint8),
+    )
+    return buf.getvalue()
+
+
+def _unpack_state(blob: bytes) -> Optional[Any]:
+    """Rebuild a ``LlamaState`` saved by ``_pack_state``; None if the entry is unreadable."""
+    import inspect
+    import zipfile
+
+    import numpy as np
+    from llama_cpp import LlamaState  # type: ignore
+
+    try:
+        with np.load(io.BytesIO(blob), allow_pickle=False) as z:
+            header = json.loads(z["header"].tobytes().decode("utf-8"))
+            raw = z["llama_state"].tobytes()
+            fields = {
+                "input_ids": z["input_ids"],
+                "scores": z["scores"],
+                "n_tokens": int(header["n_tokens"]),
+                "llama_state": raw,
+                "llama_state_size": len(raw),
+                "seed": header.get("seed"),
+            }
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    # The constructor's fields differ between llama-cpp-python releases
+    params = inspect.signature(LlamaState).parameters
+    return LlamaState(**{k: v for k, v in fields.items() if k in params})
+
+
+def _chat_prefix(system_prompt: str, user_prefix: str) -> str:
+    # Mirrors llama-cpp-python's "qwen2" chat format used by load_llm
+    return f"<|im_start|>system\n{system_prompt}<|im_end|>\n<|im_start|>user\n{user_prefix}"
+
+
+def _model_identity(cfg: Dict) -> Dict:
+    p = _model_path(cfg)
+    try:
+        st = p.stat()
+        return {"name": p.name, "size": st.st_size, "mtime": int(st.st_mtime)}
+    except OSError:
+        return {"name": p.name}
+
+
+def load_llm(cfg: Optional[Dict] = None):
+    """Load the llama.cpp model described by ``configs/llm.yaml``."""
+    cfg = cfg if cfg is not None else load_yaml(LLM_CONFIG_PATH)
     backend = cfg.get("backend", "llama-cpp")
     if backend != "llama-cpp":
         raise ValueError("Only llama-cpp backend is supported in this project")
 
-    model_path = Path("data/models/llm") / cfg.get("model")
+    model_path = _model_path(cfg)
     if not model_path.exists():
         raise FileNotFoundError(f"Model file not found: {model_path}. Run scripts/download_models.sh")
 
     from llama_cpp import Llama
 
-    ctx = int(cfg.get("context", 4096))
-    n_gpu_layers = int(cfg.get("gpu_layers", 0))
-    samp = cfg.get("sampling", {})
-    temperature = float(samp.get("temperature", 0.2))
-    top_p = float(samp.get("top_p", 0.9))
-    max_tokens = int(samp.get("max_tokens", 1024))
-
-    llm = Llama(
+    return Llama(
         model_path=str(model_path),
-        n_ctx=ctx,
-        n_gpu_layers=n_gpu_layers,
+        n_ctx=int(cfg.get("context", 4096)),
+        n_gpu_layers=int(cfg.get("gpu_layers", 0)),
         chat_format="qwen2",
         verbose=False,
     )
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
-    ]
-
-    out = llm.create_chat_completion(
-        messages=messages,
-        temperature=temperature,
-        top_p=top_p,
-        max_tokens=max_tokens,
-    )
-    text = out["choices"][0]["message"]["content"].strip()
-
-    notes = _parse_notes(text)
-    notes["model_info"] = {
-        "backend": backend,
-        "model": str(model_path.name),
-        "context": ctx,
-        "gpu_layers": n_gpu_layers,
-        "sampling": {
-            "temperature": temperature,
-            "top_p": top_p,
-            "max_tokens": max_tokens,
-        },
-    }
-    notes["markdown"] = text
 
-    return notes, text
+def _model_path(cfg: Dict) -> Path:
+    return Path("data/models/llm") / cfg.get("model")
 
 
-def _segments_to_text(segments: List[Dict]) -> str:
-    lines = []
-    for s in segments:
-        start = _fmt_ts(s.get("start", 0.0))
-        text = s.get("text", "").strip()
-        lines.append(f"[{start}] {text}")
-    return "\n".join(lines)
+def _segments_to_lines(segments: List[Dict]) -> List[str]:
+    # A SegmentStore hands out its columns directly instead of one dict per segment
+    if hasattr(segments, "rows"):
+        rows: Iterator = ((start, text) for start, _end, text in segments.rows())
+    else:
+        rows = ((s.get("start", 0.0), s.get("text", "")) for s in segments)
+    return [f"[{_fmt_ts(start)}] {' '.join(text.split())}" for start, text in rows]
 
 
 def _fmt_ts(x: float) -> str:
@@ -92,24 +572,47 @@ def _fmt_ts(x: float) -> str:
 
 
 def _parse_notes(text: str) -> Dict:
-    # Heuristic parser for the three sections
-    sections = {
-        "main_points": [],
-        "discussion_points": [],
-        "action_items": [],
-    }
+    parser = _NotesParser()
+    parser.feed(text)
+    parser.close()
+    return parser.sections
 
-    current = None
-    for line in text.splitlines():
+
+class _NotesParser:
+    """Heuristic parser for the three sections, fed text as it is generated.
+
+    ``feed`` returns the ``(section, item)`` pairs whose lines were completed
+    by the new text; ``close`` flushes the last, unterminated line.
+    """
+
+    def __init__(self):
+        self.sections: Dict[str, List[str]] = {
+            "main_points": [],
+            "discussion_points": [],
+            "action_items": [],
+        }
+        self._current: Optional[str] = None
+        self._buf = ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        *lines, self._buf = (self._buf + text).split("\n")
+        return [item for item in map(self._line, lines) if item is not None]
+
+    def close(self) -> List[Tuple[str, str]]:
+        line, self._buf = self._buf, ""
+        item = self._line(line)
+        return [item] if item is not None else []
+
+    def _line(self, line: str) -> Optional[Tuple[str, str]]:
         low = line.lower().strip()
         if low.startswith("main points"):
-            current = "main_points"; continue
+            self._current = "main_points"; return None
         if low.startswith("discussion points"):
-            current = "discussion_points"; continue
+            self._current = "discussion_points"; return None
         if low.startswith("action items"):
-            current = "action_items"; continue
-        if line.strip().startswith(('-', '*')) and current:
+            self._current = "action_items"; return None
+        if line.strip().startswith(('-', '*')) and self._current:
             item = line.strip()[1:].strip()
-            sections[current].append(item)
-
-    return sections
+            self.sections[self._current].append(item)
+            return self._current, item
+        return None
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .io_utils import mmss, write_transcript
+from .metrics import span
+
+
+SEGMENTS_LOG = "segments.jsonl"
+TEXT_LOG = "transcript.txt"
+CHUNK_JOURNAL = "chunks.jsonl"
+
+
+class TranscriptLog:
+    """Append-only transcript output for live sessions.
+
+    Each committed segment becomes one line in ``segments.jsonl`` and one line
+    in ``transcript.txt``; nothing already written is rewritten, so the cost of
+    an update does not grow with meeting length. Files are flushed on every
+    append and fsync'd at most every ``fsync_sec`` seconds.
+    """
+
+    def __init__(self, outdir: str | Path, fsync_sec: float = 5.0):
+        self.outdir = Path(outdir)
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        self.fsync_sec = fsync_sec
+        # A new session starts fresh logs, as the old full rewrites did
+        self._jsonl = open(self.outdir / SEGMENTS_LOG, "w", encoding="utf-8")
+        self._txt = open(self.outdir / TEXT_LOG, "w", encoding="utf-8")
+        self._last_sync = time.monotonic()
+
+    def append(self, segments: List[Dict]) -> None:
+        if not segments:
+            return
+        with span("io.append_log"):
+            self._jsonl.write("".join(json.dumps(s, ensure_ascii=False) + "\n" for s in segments))
+            self._txt.write("".join(f"[{mmss(s['start'])}-{mmss(s['end'])}] {s['text']}\n" for s in segments))
+            self._jsonl.flush()
+            self._txt.flush()
+            if time.monotonic() - self._last_sync >= self.fsync_sec:
+                self.sync()
+
+    def sync(self) -> None:
+        os.fsync(self._jsonl.fileno())
+        os.fsync(self._txt.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if self._jsonl.closed:
+            return
+        self.sync()
+        self._jsonl.close()
+        self._txt.close()
+
+    def compact(self) -> List[Dict]:
+        """Close the log and write the usual ``transcript.json``/``.txt`` from it."""
+        self.close()
+        return compact(self.outdir)
+
+    def __enter__(self) -> "TranscriptLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_segments(outdir: str | Path) -> List[Dict]:
+    """Read ``segments.jsonl``, ignoring a torn last line from an interrupted write."""
+    segments = []
+    path = Path(outdir) / SEGMENTS_LOG
+    if not path.exists():
+        return segments
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                segments.append(json.loads(line))
+            except ValueError:
+                break
+    return segments
+
+
+def compact(outdir: str | Path) -> List[Dict]:
+    """Rewrite a session log as ``transcript.json`` + ``transcript.txt`` sorted by time.
+
+    Also usable after a crash to recover a session from its ``segments.jsonl``.
+    """
+    segments = sorted(read_segments(outdir), key=lambda s: float(s.get("start", 0)))
+    write_transcript(outdir, segments)
+    return segments
+
+
+class ChunkJournal:
+    """Checkpoint of per-chunk ASR results for resuming a long ``transcribe_file``.
+
+    The first line identifies the run (input digest and recognition
+    settings); every other line holds one chunk window and its chunk-relative
+    segments, appended and fsync'd as soon as the chunk is transcribed. With
+    ``resume`` the finished chunks of a matching journal are served back
+    instead of re-running the model; a journal from another input or other
+    settings is started over.
+    """
+
+    def __init__(self, path: str | Path, run: Dict, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run = run
+        self.done: Dict[Tuple[float, float], List[Dict]] = self._read() if resume else {}
+        # Rewrite what is kept, so appends never follow a torn line
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"journal": 1, "run": run}) + "\n")
+            for (start, end), segments in self.done.items():
+                f.write(json.dumps({"start": start, "end": end, "segments": segments}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def __contains__(self, window: Tuple[float, float]) -> bool:
+        return _window_key(*window) in self.done
+
+    def pop(self, window: Tuple[float, float]) -> Optional[List[Dict]]:
+        return self.done.pop(_window_key(*window), None)
+
+    def add(self, windows: List[Tuple[float, float]], results: List[List[Dict]]) -> None:
+        """Record finished chunks; call before their segments are shifted or stitched."""
+        if not windows:
+            return
+        with span("io.journal"):
+            lines = []
+            for (start, end), segments in zip(windows, results):
+                start, end = _window_key(start, end)
+                lines.append(json.dumps({"start": start, "end": end, "segments": segments}, ensure_ascii=False))
+            self._f.write("\n".join(lines) + "\n")
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+    def _read(self) -> Dict[Tuple[float, float], List[Dict]]:
+        done: Dict[Tuple[float, float], List[Dict]] = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            try:
+                head = json.loads(f.readline())
+            except ValueError:
+                return done
+            if head.get("run") != self.run:
+                print(f"[asr] {self.path.name} is from another input or other settings; starting over")
+                return done
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break  # torn last line from an interrupted write
+                done[_window_key(rec["start"], rec["end"])] = rec["segments"]
+        return done
+
+
+def journal_path(outdir: str | Path, cfg: Dict, resume: bool = False) -> Optional[Path]:
+    """Chunk journal for a run writing to ``outdir``, if checkpointing is on.
+
+    Only with ``resume`` or ``journal: true`` in ``configs/asr.yaml``: the
+    journal costs a hash of the whole input. Delete it once the transcript is
+    written.
+    """
+    if not resume and not bool(cfg.get("journal", False)):
+        return None
+    return Path(outdir).resolve() / CHUNK_JOURNAL
+
+
+def _window_key(start: float, end: float) -> Tuple[float, float]:
+    return round(float(start), 3), round(float(end), 3)
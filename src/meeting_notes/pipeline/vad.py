@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class EnergyVAD:
+    """Vectorized speech-activity detector over 16 kHz mono float32 PCM.
+
+    Audio is cut into fixed frames and analysed with one batched FFT per
+    block of frames. A frame counts as speech when its energy in the speech
+    band clears the running noise floor by ``margin_db`` (and
+    ``threshold_db``, which only rules out near-digital silence, so quiet
+    recordings still pass), and its spectrum is not flat like broadband noise. The
+    frame mask is then cleaned up (short gaps bridged, short bursts dropped,
+    edges padded) into speech regions.
+    """
+
+    def __init__(
+        self,
+        sr: int = 16000,
+        frame_sec: float = 0.03,
+        threshold_db: float = -70.0,
+        margin_db: float = 12.0,
+        max_flatness: float = 0.45,
+        min_speech_sec: float = 0.25,
+        min_silence_sec: float = 0.5,
+        pad_sec: float = 0.2,
+        band_hz: tuple = (100.0, 4000.0),
+    ):
+        self.sr = sr
+        self.frame = max(1, int(frame_sec * sr))
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.max_flatness = max_flatness
+        self.min_speech_sec = min_speech_sec
+        self.min_silence_sec = min_silence_sec
+        self.pad_sec = pad_sec
+        freqs = np.fft.rfftfreq(self.frame, 1.0 / sr)
+        self._band = (freqs >= band_hz[0]) & (freqs <= band_hz[1])
+        self._window = np.hanning(self.frame).astype(np.float32)
+        # Lowest per-call noise estimate seen so far; persists across live windows
+        self.floor_db: Optional[float] = None
+
+    @property
+    def frame_sec(self) -> float:
+        return self.frame / self.sr
+
+    def frame_features(self, audio: np.ndarray, block_frames: int = 4096):
+        """Return per-frame band energy (dBFS) and spectral flatness."""
+        x = np.asarray(audio, dtype=np.float32).reshape(-1)
+        n = x.shape[0] // self.frame
+        energy = np.empty(n, dtype=np.float32)
+        flatness = np.empty(n, dtype=np.float32)
+        frames = x[: n * self.frame].reshape(n, self.frame)
+        norm = float(np.sum(self._window**2)) * self.frame / 2
+        # Blocks keep the FFT scratch bounded on hour-long recordings
+        for i in range(0, n, block_frames):
+            power = np.abs(np.fft.rfft(frames[i : i + block_frames] * self._window, axis=1)) ** 2
+            band = power[:, self._band] + 1e-12
+            energy[i : i + block_frames] = 10 * np.log10(band.sum(axis=1) / norm + 1e-12)
+            flatness[i : i + block_frames] = np.exp(np.log(band).mean(axis=1)) / band.mean(axis=1)
+        return energy, flatness
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        energy, flatness = self.frame_features(audio)
+        if not energy.size:
+            return np.zeros(0, dtype=bool)
+        floor = float(np.percentile(energy, 10))
+        self.floor_db = floor if self.floor_db is None else min(self.floor_db, floor)
+        level = max(self.threshold_db, self.floor_db + self.margin_db)
+        return (energy > level) & (flatness < self.max_flatness)
+
+    def speech_regions(self, audio: np.ndarray) -> np.ndarray:
+        """Speech regions as an ``(n, 2)`` array of (start, end) seconds."""
+        mask = self.speech_mask(audio)
+        total = np.asarray(audio).reshape(-1).shape[0] / self.sr
+        return _mask_to_regions(
+            mask,
+            self.frame_sec,
+            total,
+            min_speech_sec=self.min_speech_sec,
+            min_silence_sec=max(self.min_silence_sec, 2 * self.pad_sec),
+            pad_sec=self.pad_sec,
+        )
+
+    def has_speech(self, audio: np.ndarray) -> bool:
+        return bool(self.speech_regions(audio).shape[0])
+
+
+class SileroVAD:
+    """Same interface as ``EnergyVAD`` backed by the small Silero VAD model."""
+
+    def __init__(self, sr: int = 16000, min_speech_sec: float = 0.25, min_silence_sec: float = 0.5, pad_sec: float = 0.2):
+        import torch  # type: ignore
+        from silero_vad import get_speech_timestamps, load_silero_vad  # type: ignore
+
+        self.torch = torch
+        self.sr = sr
+        self.model = load_silero_vad()
+        self._timestamps = get_speech_timestamps
+        self.min_speech_sec = min_speech_sec
+        self.min_silence_sec = min_silence_sec
+        self.pad_sec = pad_sec
+
+    def speech_regions(self, audio: np.ndarray) -> np.ndarray:
+        x = self.torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32).reshape(-1))
+        ts = self._timestamps(
+            x,
+            self.model,
+            sampling_rate=self.sr,
+            min_speech_duration_ms=int(self.min_speech_sec * 1000),
+            min_silence_duration_ms=int(self.min_silence_sec * 1000),
+            speech_pad_ms=int(self.pad_sec * 1000),
+            return_seconds=True,
+        )
+        return np.array([[t["start"], t["end"]] for t in ts], dtype=np.float64).reshape(-1, 2)
+
+    def has_speech(self, audio: np.ndarray) -> bool:
+        return bool(self.speech_regions(audio).shape[0])
+
+
+def make_vad(cfg: Dict, sr: int = 16000):
+    """Build the speech detector from ``vad_prepass`` in the ASR config, or None if disabled."""
+    vc = cfg.get("vad_prepass", {})
+    if not bool(vc.get("enabled", False)):
+        return None
+    common = {
+        "sr": sr,
+        "min_speech_sec": float(vc.get("min_speech_sec", 0.25)),
+        "min_silence_sec": float(vc.get("min_silence_sec", 0.5)),
+        "pad_sec": float(vc.get("pad_sec", 0.2)),
+    }
+    if str(vc.get("method", "energy")).lower() == "silero":
+        try:
+            return SileroVAD(**common)
+        except Exception as e:
+            print(f"[vad] Silero VAD unavailable ({e}); using the energy detector")
+    return EnergyVAD(
+        threshold_db=float(vc.get("threshold_db", -70.0)),
+        margin_db=float(vc.get("margin_db", 12.0)),
+        max_flatness=float(vc.get("max_flatness", 0.45)),
+        **common,
+    )
+
+
+def _mask_to_regions(
+    mask: np.ndarray,
+    frame_sec: float,
+    total_sec: float,
+    min_speech_sec: float,
+    min_silence_sec: float,
+    pad_sec: float,
+) -> np.ndarray:
+    if not mask.any():
+        return np.zeros((0, 2), dtype=np.float64)
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1) * frame_sec
+    ends = np.flatnonzero(edges == -1) * frame_sec
+    # Bridge pauses shorter than min_silence_sec
+    keep_gap = starts[1:] - ends[:-1] >= min_silence_sec
+    starts = starts[np.concatenate([[True], keep_gap])]
+    ends = ends[np.concatenate([keep_gap, [True]])]
+    # Drop clicks and other short bursts, then pad what is left
+    long_enough = ends - starts >= min_speech_sec
+    starts, ends = starts[long_enough], ends[long_enough]
+    regions = np.stack([np.maximum(0.0, starts - pad_sec), np.minimum(total_sec, ends + pad_sec)], axis=1)
+    return regions.reshape(-1, 2)
@@ -0,0 +1,504 @@
+from __future__ import annotations
+
+import hmac
+import itertools
+import json
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Clients look here for a running daemon, e.g. http://127.0.0.1:8765
+DAEMON_ENV = "MEETING_NOTES_DAEMON"
+# Shared secret between `serve` and the CLI; readable by the owner only
+TOKEN_FILE = "daemon.token"
+
+
+class DaemonBusy(RuntimeError):
+    """The daemon's queue for this priority class is full."""
+
+
+class _Job:
+    def __init__(self, job_id: str, kind: str, payload: Dict[str, Any], priority: str):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "submitted": self.submitted,
+            "finished": self.finished,
+        }
+
+
+class _Worker:
+    """Runs queued jobs against models that stay loaded.
+
+    Each priority class has its own queue and ``limits[class]`` worker
+    threads, so a long batch job never sits in front of a live window; model
+    calls are then ordered by the ``Scheduler``.
+    """
+
+    # Job kind -> default priority class
+    KINDS = {"transcribe": "batch", "summarize": "interactive", "transcribe_audio": "live"}
+
+    def __init__(self, keep_jobs: int = 1000):
+        from meeting_notes.pipeline.asr_engine import _load_asr_config
+        from meeting_notes.pipeline.scheduler import PRIORITIES, scheduler_from_config
+
+        self.cfg = _load_asr_config()
+        self.scheduler = scheduler_from_config(self.cfg)
+        roots = self.cfg.get("serve", {}).get("roots") or ["."]
+        self.roots = [Path(r).expanduser().resolve() for r in roots]
+        self.jobs: Dict[str, _Job] = {}
+        self.pending: Dict[str, "queue.Queue[_Job]"] = {c: queue.Queue() for c in PRIORITIES}
+        self.keep_jobs = keep_jobs
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # One llama.cpp context: summaries run one at a time whatever their class
+        self._llm_lock = threading.Lock()
+        self._asr = None
+        self._llm = None
+        self._threads = [
+            threading.Thread(target=self._run, args=(c,), name=f"serve-{c}-{i}", daemon=True)
+            for c in PRIORITIES
+            for i in range(self.scheduler.limits[c])
+        ]
+
+    def start(self) -> None:
+        for t in self._threads:
+            t.start()
+
+    def preload(self) -> None:
+        self._get_asr()
+        self._get_llm()
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: Optional[str] = None) -> _Job:
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown job kind: {kind!r}")
+        priority = priority or self.KINDS[kind]
+        if priority not in self.pending:
+            raise ValueError(f"Unknown priority: {priority!r}")
+        payload = self._checked_paths(kind, payload)
+        if not self.scheduler.admit(priority, self.pending[priority].qsize()):
+            raise DaemonBusy(f"{priority} queue is full ({self.scheduler.max_queue[priority]} jobs)")
+        with self._lock:
+            job = _Job(str(next(self._ids)), kind, payload, priority)
+            self.jobs[job.id] = job
+            # Forget the oldest finished jobs so a long-lived daemon stays bounded
+            if len(self.jobs) > self.keep_jobs:
+                for jid in [j.id for j in self.jobs.values() if j.done.is_set()][: len(self.jobs) - self.keep_jobs]:
+                    del self.jobs[jid]
+        self.pending[priority].put(job)
+        return job
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "queued": sum(q.qsize() for q in self.pending.values()),
+            "asr_loaded": self._asr is not None,
+            "llm_loaded": self._llm is not None,
+            "scheduler": self.scheduler.stats(),
+        }
+
+    def _checked_paths(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Never trust a path from the wire: resolve it and keep it under serve.roots
+        from meeting_notes.pipeline.transcript_log import CHUNK_JOURNAL
+
+        payload = dict(payload)
+        if kind == "transcribe":
+            payload["path"] = str(self._allowed(payload.get("path"), is_file=True))
+            if payload.get("journal") is not None:
+                journal = self._allowed(payload["journal"])
+                if journal.name != CHUNK_JOURNAL:
+                    raise PermissionError(f"Journal must be named {CHUNK_JOURNAL}")
+                payload["journal"] = str(journal)
+        elif kind == "transcribe_audio":
+            payload["audio"] = [
+                str(self._allowed(a, is_file=True)) if isinstance(a, str) else a for a in payload.get("audio", [])
+            ]
+        return payload
+
+    def _allowed(self, path: Any, is_file: bool = False) -> Path:
+        if not isinstance(path, str) or not path:
+            raise ValueError("Expected a path")
+        resolved = Path(path).resolve()
+        if not any(resolved.is_relative_to(root) for root in self.roots):
+            raise PermissionError(f"{resolved} is outside the directories this daemon serves (serve.roots)")
+        if is_file and not resolved.is_file():
+            raise ValueError(f"Not a file: {resolved}")
+        return resolved
+
+    def _get_asr(self):
+        with self._load_lock:
+            if self._asr is None:
+                from meeting_notes.pipeline.asr_engine import build_backend
+
+                self._asr = build_backend(self.cfg)
+        return self._asr
+
+    def _get_llm(self):
+        with self._load_lock:
+            if self._llm is None:
+                from meeting_notes.pipeline.summarizer import get_llm
+
+                self._llm = get_llm()
+        return self._llm
+
+    def _run(self, priority: str) -> None:
+        from meeting_notes.pipeline.metrics import run_metrics
+
+        while True:
+            job = self.pending[priority].get()
+            job.status = "running"
+            try:
+                with run_metrics() as metrics:
+                    job.result = self._execute(job)
+                job.result["metrics"] = metrics.summary()
+                job.status = "done"
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "failed"
+            job.finished = time.time()
+            job.done.set()
+
+    def _execute(self, job: _Job) -> Any:
+        from meeting_notes.pipeline.scheduler import ScheduledBackend
+
+        if job.kind == "summarize":
+            from meeting_notes.pipeline.summarizer import cached_summary, summarize
+
+            # The LLM is not scheduled; only the queue wait is recorded
+            self.scheduler.record(job.priority, time.time() - job.submitted)
+            # Cached notes don't need the model loaded
+            hit = cached_summary(job.payload["segments"])
+            if hit is None:
+                with self._llm_lock:
+                    hit = summarize(job.payload["segments"], llm=self._get_llm())
+            notes, markdown = hit
+            return {"notes": notes, "markdown": markdown}
+        # The job's queue time counts towards its first model call
+        asr = ScheduledBackend(self._get_asr(), self.scheduler, job.priority, since=job.submitted)
+        if job.kind == "transcribe":
+            from meeting_notes.pipeline.asr_engine import transcribe_file
+
+            segments = transcribe_file(
+                job.payload["path"],
+                backend=asr,
+                cfg=self.cfg,
+                journal=job.payload.get("journal"),
+                resume=bool(job.payload.get("resume", False)),
+            )
+            return {"segments": segments}
+        audios = [_decode_audio(a) for a in job.payload["audio"]]
+        # The caller's decoding options, as a local backend would have received them
+        language = job.payload.get("language") or self.cfg.get("language")
+        vad = job.payload.get("vad")
+        vad = self.cfg.get("vad") if vad is None else bool(vad)
+        if job.payload.get("words"):
+            prompt = job.payload.get("prompt")
+            return {
+                "words": [
+                    [list(w) for w in asr.transcribe_words(a, language=language, vad=vad, prompt=prompt)] for a in audios
+                ]
+            }
+        return {
+            "segments": asr.transcribe_batch(
+                audios,
+                language=language,
+                vad=vad,
+                batch_size=len(audios),
+                durations=job.payload.get("durations"),
+            )
+        }
+
+
+def _encode_audio(audio: Any) -> Any:
+    # Float32 windows travel as base64 PCM16, paths as they are
+    if isinstance(audio, str):
+        return audio
+    import base64
+
+    import numpy as np
+
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    return {"pcm16": base64.b64encode(pcm.tobytes()).decode("ascii")}
+
+
+def _decode_audio(audio: Any) -> Any:
+    if isinstance(audio, str):
+        return audio
+    import base64
+
+    import numpy as np
+
+    pcm = np.frombuffer(base64.b64decode(audio["pcm16"]), dtype="<i2")
+    return pcm.astype(np.float32) / 32768.0
+
+
+def _make_handler(worker: _Worker, token: str):
+    from http.server import BaseHTTPRequestHandler
+
+    class _Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt: str, *args: Any) -> None:
+            pass
+
+        def _authorized(self) -> bool:
+            sent = self.headers.get("Authorization", "")
+            if hmac.compare_digest(sent.encode(), f"Bearer {token}".encode()):
+                return True
+            self._reply(401, {"error": f"missing or wrong token (see {token_path()})"})
+            return False
+
+        def _reply(self, code: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if not self._authorized():
+                return
+            if self.path == "/health":
+                self._reply(200, worker.status())
+                return
+            if self.path.startswith("/jobs/"):
+                job = worker.jobs.get(self.path[len("/jobs/") :])
+                if job is None:
+                    self._reply(404, {"error": "unknown job"})
+                else:
+                    self._reply(200, job.to_dict())
+                return
+            self._reply(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if not self._authorized():
+                return
+            if self.path != "/jobs":
+                self._reply(404, {"error": "not found"})
+                return
+            # JSON only: browsers can send text/plain and form bodies cross-origin without a preflight
+            ctype = self.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+            if ctype != "application/json":
+                self._reply(415, {"error": "Content-Type must be application/json"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                job = worker.submit(str(body.get("kind")), body.get("payload", {}), body.get("priority"))
+            except DaemonBusy as e:
+                self._reply(503, {"error": str(e)})
+                return
+            except PermissionError as e:
+                self._reply(403, {"error": str(e)})
+                return
+            except (ValueError, json.JSONDecodeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            if body.get("wait", True):
+                job.done.wait()
+            self._reply(200, job.to_dict())
+
+    return _Handler
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, preload: bool = False) -> None:
+    """Run the warm-model daemon until interrupted.
+
+    Jobs are posted as ``{"kind": "transcribe"|"summarize"|"transcribe_audio",
+    "payload": {...}}`` to ``/jobs``, optionally with a ``priority`` class
+    (``live``, ``interactive``, ``batch``), and run against ASR and LLM models
+    that are loaded once and reused for every request. Live windows from
+    ``asr-live`` go ahead of ``asr-file`` chunks; see ``scheduler`` in
+    ``configs/asr.yaml``.
+
+    Every request must carry the token from ``token_path()`` (created on first
+    start, mode 0600) as ``Authorization: Bearer <token>``, and files named in
+    a job must lie under ``serve.roots``.
+    """
+    from http.server import ThreadingHTTPServer
+
+    token = _ensure_token()
+    worker = _Worker()
+    if preload:
+        worker.preload()
+    worker.start()
+    httpd = ThreadingHTTPServer((host, port), _make_handler(worker, token))
+    print(f"[serve] listening on http://{host}:{port}")
+    print(f"[serve] token in {token_path()}; files under {', '.join(str(r) for r in worker.roots)}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("[serve] Stopped by user")
+    finally:
+        httpd.server_close()
+
+
+def daemon_url() -> str:
+    return os.environ.get(DAEMON_ENV, f"http://{DEFAULT_HOST}:{DEFAULT_PORT}").rstrip("/")
+
+
+def token_path() -> Path:
+    base = os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config"
+    return Path(base) / "meeting-notes" / TOKEN_FILE
+
+
+def read_token() -> Optional[str]:
+    try:
+        return token_path().read_text().strip() or None
+    except OSError:
+        return None
+
+
+def _ensure_token() -> str:
+    path = token_path()
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    token = read_token()
+    if token is not None:
+        os.chmod(path, 0o600)
+        return token
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token + "\n")
+    return token
+
+
+def _auth_headers() -> Dict[str, str]:
+    token = read_token()
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def daemon_available(url: Optional[str] = None, timeout: float = 0.25) -> bool:
+    # urllib.request and http.client are only imported (tens of ms, on every
+    # CLI command) once something is actually listening
+    url = url or daemon_url()
+    if read_token() is None:
+        return False  # no daemon was ever started by this user
+    try:
+        parts = urlsplit(url)
+        socket.create_connection((parts.hostname, parts.port or 80), timeout=timeout).close()
+    except (OSError, ValueError):
+        return False
+    import urllib.error
+    import urllib.request
+
+    try:
+        req = urllib.request.Request(f"{url}/health", headers=_auth_headers())
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+
+def submit_job(
+    kind: str, payload: Dict[str, Any], url: Optional[str] = None, priority: Optional[str] = None
+) -> Dict[str, Any]:
+    """Submit a job to the daemon and block until its result is ready.
+
+    Raises ``DaemonBusy`` when the daemon's queue for the job's class is full
+    and ``PermissionError`` when it refuses a path outside ``serve.roots``.
+    """
+    import urllib.error
+    import urllib.request
+
+    body: Dict[str, Any] = {"kind": kind, "payload": payload, "wait": True}
+    if priority:
+        body["priority"] = priority
+    req = urllib.request.Request(
+        f"{url or daemon_url()}/jobs",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json", **_auth_headers()},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req) as resp:
+            job = json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        if e.code == 503:
+            raise DaemonBusy(json.loads(e.read() or b"{}").get("error", "daemon busy")) from e
+        if e.code == 403:
+            raise PermissionError(json.loads(e.read() or b"{}").get("error", "refused by the daemon")) from e
+        raise
+    if job["status"] != "done":
+        raise RuntimeError(f"Daemon job {job['id']} failed: {job['error']}")
+    return job["result"]
+
+
+class DaemonBackend:
+    """ASR backend that runs each call in the ``serve`` daemon as a ``live`` job.
+
+    Lets ``asr-live`` share the daemon's loaded model with offline work
+    instead of loading a second copy. A window the daemon has no room for is
+    skipped (counted as ``live.rejected``) rather than ending the session.
+    """
+
+    backend_name = "daemon"
+
+    def __init__(self, url: Optional[str] = None, priority: str = "live"):
+        self.url = url
+        self.priority = priority
+
+    def transcribe_batch(
+        self,
+        audios: List[Any],
+        language: Optional[str] = None,
+        vad: Optional[bool] = None,
+        durations: Optional[List[float]] = None,
+        **_: Any,
+    ) -> List[List[Dict]]:
+        payload: Dict[str, Any] = {"audio": [_encode_audio(a) for a in audios], "language": language, "vad": vad}
+        if durations is not None:
+            payload["durations"] = list(durations)
+        result = self._submit(payload)
+        return result["segments"] if result is not None else [[] for _ in audios]
+
+    def transcribe(self, audio: Any, language: Optional[str] = None, vad: Optional[bool] = None, **_: Any) -> List[Dict]:
+        return self.transcribe_batch([audio], language=language, vad=vad)[0]
+
+    def transcribe_words(
+        self,
+        audio: Any,
+        language: Optional[str] = None,
+        vad: Optional[bool] = None,
+        prompt: Optional[str] = None,
+        **_: Any,
+    ) -> List[Tuple[float, float, str]]:
+        # prompt carries the committed text the streaming decoder conditions on
+        payload = {"audio": [_encode_audio(audio)], "words": True, "language": language, "vad": vad, "prompt": prompt}
+        result = self._submit(payload)
+        return [tuple(w) for w in result["words"][0]] if result is not None else []
+
+    def _submit(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return submit_job("transcribe_audio", payload, url=self.url, priority=self.priority)
+        except DaemonBusy as e:
+            from meeting_notes.pipeline.metrics import current
+
+            current().inc("live.rejected")
+            print(f"[live] daemon busy, window skipped: {e}")
+            return None
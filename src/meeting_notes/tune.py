@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import copy
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from meeting_notes.bench import SAMPLE_RATE, synth_meeting, write_wav
+
+
+SAMPLES_DIR = Path("data/samples")
+# Whisper backends decode one chunk at a time, so batch_size does not change their speed
+UNBATCHED_BACKENDS = ("faster-whisper", "whisper", "crisper-whisper")
+
+
+def run_tune(
+    seconds: float = 60.0,
+    audio: Optional[str | Path] = None,
+    segments: Sequence[int] = (10, 20, 30),
+    overlaps: Sequence[int] = (0, 1, 2),
+    batch_sizes: Sequence[int] = (1, 4, 8),
+    min_agreement: float = 0.97,
+    max_mem_mb: Optional[float] = None,
+    backend: Optional[object] = None,
+    cfg: Optional[Dict] = None,
+) -> Dict[str, Any]:
+    """Time ``transcribe_file`` over a grid of chunk lengths, overlaps and batch sizes.
+
+    Runs the configured model on ``seconds`` of calibration audio (``audio``,
+    else the first recording in ``data/samples``, else synthetic speech) with
+    caching off. The fastest setting wins among those whose transcript agrees
+    with the most conservative run (longest chunks, most overlap, smallest
+    batch) on at least ``min_agreement`` of its words and, with
+    ``max_mem_mb``, whose peak memory fits. Returns the choice and every run;
+    ``synthetic`` marks results whose agreement means nothing (see ``tune``).
+    """
+    from meeting_notes.pipeline.asr_engine import _load_asr_config, build_backend, transcribe_file
+    from meeting_notes.pipeline.metrics import run_metrics
+
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found; tune runs the real transcribe_file path")
+    # Tune from the plain config, not an older profile
+    cfg = copy.deepcopy(cfg if cfg is not None else _load_asr_config(profile=False))
+    cfg["cache"] = {"enabled": False}
+    model = backend if backend is not None else build_backend(cfg)
+    if str(cfg.get("backend")) in UNBATCHED_BACKENDS:
+        print(f"[tune] {cfg.get('backend')} decodes one chunk at a time; batch_size is not tuned")
+        batch_sizes = (1,)
+    grid = [(s, o, b) for s in sorted(set(segments)) for o in sorted(set(overlaps)) for b in sorted(set(batch_sizes))]
+    grid = [g for g in grid if g[1] < g[0]]
+    if not grid:
+        raise ValueError("Empty grid: overlaps must be shorter than the chunks")
+
+    with tempfile.TemporaryDirectory(prefix="tune-") as tmp:
+        wav, source, synthetic = _calibration_audio(Path(tmp), seconds, audio)
+        # Warm-up: model load, CUDA kernels and allocator caches stay out of the timings
+        with run_metrics():
+            transcribe_file(wav, backend=model, cfg=_variant(cfg, grid[0][0], grid[0][1], 1))
+        runs = []
+        for seg, ov, bs in grid:
+            run: Dict[str, Any] = {"segment_sec": seg, "overlap_sec": ov, "batch_size": bs}
+            t0 = time.perf_counter()
+            try:
+                with run_metrics() as metrics, _peak_mem() as mem:
+                    segs = transcribe_file(wav, backend=model, cfg=_variant(cfg, seg, ov, bs))
+            except Exception as e:  # e.g. CUDA out of memory at a large batch
+                run["error"] = f"{type(e).__name__}: {e}"
+                _free_cache()
+                print(f"[tune] {seg}s/{ov}s x{bs}: failed ({run['error'][:80]})")
+                runs.append(run)
+                continue
+            wall = time.perf_counter() - t0
+            audio_sec = metrics.gauges.get("asr.audio_sec") or seconds
+            run.update(
+                rtf=round(wall / audio_sec, 4),
+                throughput_x=round(audio_sec / wall, 1),
+                peak_mb=mem["mb"],
+                words=" ".join(s.get("text", "") for s in segs),
+            )
+            runs.append(run)
+            print(f"[tune] {seg}s/{ov}s x{bs}: {run['throughput_x']}x real time, peak {run['peak_mb']} MB")
+
+    ok = [r for r in runs if "error" not in r]
+    if not ok:
+        raise RuntimeError("Every calibration run failed; see the errors above")
+    ref = max(ok, key=lambda r: (r["segment_sec"], r["overlap_sec"], -r["batch_size"]))
+    ref_words = _tokens(ref["words"])
+    for r in ok:
+        r["agreement"] = round(_agreement(ref_words, _tokens(r["words"])), 4)
+    for r in runs:
+        r.pop("words", None)
+    eligible = [
+        r
+        for r in ok
+        if r["agreement"] >= min_agreement and (max_mem_mb is None or r["peak_mb"] is None or r["peak_mb"] <= max_mem_mb)
+    ]
+    best = min(eligible or [ref], key=lambda r: (r["rtf"], -r["throughput_x"]))
+    return {
+        "audio": source,
+        "synthetic": synthetic,
+        "seconds": round(seconds, 1),
+        "min_agreement": min_agreement,
+        "max_mem_mb": max_mem_mb,
+        "best": dict(best),
+        "settings": {
+            "batch_size": best["batch_size"],
+            "chunking": {"segment_sec": best["segment_sec"], "overlap_sec": best["overlap_sec"]},
+        },
+        "runs": runs,
+    }
+
+
+def format_tune(result: Dict[str, Any]) -> str:
+    lines = [f"tune: {result['seconds']}s of {result['audio']}"]
+    lines.append("  segment  overlap  batch   speed      peak MB  agreement")
+    for r in result["runs"]:
+        head = f"  {r['segment_sec']:>6}s  {r['overlap_sec']:>6}s  {r['batch_size']:>5}"
+        if "error" in r:
+            lines.append(f"{head}   failed: {r['error'][:50]}")
+            continue
+        mark = "  <- best" if all(r[k] == result["best"][k] for k in ("segment_sec", "overlap_sec", "batch_size")) else ""
+        lines.append(f"{head}  {r['throughput_x']:>6}x  {r['peak_mb'] or '-':>9}  {r['agreement']:>9.3f}{mark}")
+    return "\n".join(lines)
+
+
+def _calibration_audio(tmp: Path, seconds: float, audio: Optional[str | Path]):
+    if audio is None:
+        from meeting_notes.pipeline.batch import expand_inputs
+
+        # Media files only: data/samples also holds .gitkeep and the like
+        found = [p for p in expand_inputs(str(SAMPLES_DIR)) if not p.name.startswith(".")] if SAMPLES_DIR.is_dir() else []
+        audio = found[0] if found else None
+    if audio is None:
+        x = synth_meeting(seconds, seed=0)
+        source, synthetic = "synthetic speech", True
+        # A real model hears little in synthetic tones, so agreement says nothing about chunk joins
+        print(f"[tune] no recording in {SAMPLES_DIR}; synthetic audio measures speed and memory only (use --audio)")
+    else:
+        from meeting_notes.pipeline.audio_utils import ffmpeg_decode_to_array
+
+        x = ffmpeg_decode_to_array(audio, sr=SAMPLE_RATE)[: int(seconds * SAMPLE_RATE)]
+        source, synthetic = str(audio), False
+    return write_wav(tmp / "calibration.wav", x), source, synthetic
+
+
+def _variant(cfg: Dict, seg: int, ov: int, bs: int) -> Dict:
+    out = copy.deepcopy(cfg)
+    out["batch_size"] = bs
+    out.setdefault("chunking", {}).update(segment_sec=seg, overlap_sec=ov)
+    return out
+
+
+def _tokens(text: str) -> List[str]:
+    return [w for w in re.sub(r"[^\w' ]+", " ", text.lower()).split() if w]
+
+
+def _agreement(ref: List[str], other: List[str]) -> float:
+    # Repeated or dropped words at chunk joins show up as a lower ratio
+    if not ref and not other:
+        return 1.0
+    return SequenceMatcher(None, ref, other, autojunk=False).ratio()
+
+
+def _cuda():
+    torch = sys.modules.get("torch")
+    return torch if torch is not None and torch.cuda.is_available() else None
+
+
+@contextmanager
+def _peak_mem() -> Iterator[Dict[str, Optional[float]]]:
+    """Peak memory in MB while the block runs, in ``["mb"]`` afterwards.
+
+    GPU memory when the model runs on CUDA, else the resident set size
+    sampled from /proc (the process high-water mark never comes back down
+    between grid points); None where neither is available.
+    """
+    out: Dict[str, Optional[float]] = {"mb": None}
+    torch = _cuda()
+    if torch is not None:
+        torch.cuda.reset_peak_memory_stats()
+        try:
+            yield out
+        finally:
+            out["mb"] = round(torch.cuda.max_memory_allocated() / 2**20, 1)
+        return
+    peak = _rss_mb()
+    if peak is None:
+        yield out
+        return
+    stop = threading.Event()
+
+    def _sample() -> None:
+        nonlocal peak
+        while not stop.wait(0.02):
+            peak = max(peak, _rss_mb() or 0.0)
+
+    sampler = threading.Thread(target=_sample, name="tune-rss", daemon=True)
+    sampler.start()
+    try:
+        yield out
+    finally:
+        stop.set()
+        sampler.join()
+        out["mb"] = round(max(peak, _rss_mb() or 0.0), 1)
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _free_cache() -> None:
+    torch = _cuda()
+    if torch is not None:
+        torch.cuda.empty_cache()